@@ -1,8 +1,28 @@
+import numpy as np
 import streamlit as st
-import pandas as pd
-import pydeck as pdk
-from abc import ABC, abstractmethod
-import random
+
+from catalog import get_catalog
+from data import FOOD_PRICE, HOTEL_PRICES, NEARBY_KM, NEARBY_ROUTE_STOPS, NEARBY_STOPS
+from engine import (
+    PLAN_CACHE,
+    get_leg_planner,
+    get_plan,
+    get_prefix_routes,
+    get_price_table,
+    get_route,
+    get_spatial_index,
+    get_transports,
+)
+from image_cache import ImageCache
+from maps import DECK_CACHE, get_deck
+from metrics import METRICS, METRICS_FILE, METRICS_PORT
+from search import search_trips
+from simulation import simulate_budget
+from tradeoffs import compare_options
+from transport import TRANSPORTS
+
+clock = METRICS.stopwatch()
+CACHES = {"plans": PLAN_CACHE, "decks": DECK_CACHE}
 
 # ================== CONFIG ==================
 
@@ -12,6 +32,13 @@ st.set_page_config(
     layout="wide"
 )
 
+
+@st.cache_resource
+def start_metrics_server():
+    return METRICS.serve(METRICS_PORT, CACHES) if METRICS_PORT else None
+
+start_metrics_server()
+
 # ================== STYLE ==================
 
 # Всички снимки ще са с еднаква височина и обектът ще се побира добре
@@ -24,330 +51,24 @@ img {
 </style>
 """, unsafe_allow_html=True)
 
-# ================== DATA ==================
-
-DESTINATIONS = {
-    "🇩🇪 Германия": [
-        ("Берлин", "Къривурст"),
-        ("Мюнхен", "Баварски наденички"),
-        ("Хамбург", "Рибни специалитети"),
-        ("Кьолн", "Немска бира и брецели"),
-    ],
-    "🇫🇷 Франция": [
-        ("Париж", "Кроасан и багета"),
-        ("Лион", "Бьоф Бургиньон"),
-        ("Марсилия", "Буябес"),
-        ("Ница", "Салата Нисоаз"),
-    ],
-    "🇮🇹 Италия": [
-        ("Рим", "Карбонара"),
-        ("Флоренция", "Тосканска кухня"),
-        ("Венеция", "Морски дарове"),
-        ("Милано", "Ризото"),
-    ],
-    "🇪🇸 Испания": [
-        ("Барселона", "Паеля"),
-        ("Мадрид", "Хамон"),
-        ("Валенсия", "Тапас"),
-        ("Севиля", "Газпачо"),
-    ],
-    "🇬🇷 Гърция": [
-        ("Солун", "Гирос"),
-        ("Атина", "Мусака"),
-        ("Санторини", "Морска кухня"),
-    ],
-    "🇦🇹 Австрия": [
-        ("Виена", "Виенски шницел"),
-        ("Залцбург", "Щрудел"),
-        ("Инсбрук", "Алпийска кухня"),
-    ],
-    "🇨🇿 Чехия": [
-        ("Прага", "Гулаш"),
-        ("Бърно", "Чешка кухня"),
-    ],
-    "🇳🇱 Нидерландия": [
-        ("Амстердам", "Херинга"),
-        ("Ротердам", "Морски дарове"),
-    ],
-    "🇸🇪 Швеция": [
-        ("Стокхолм", "Кюфтета"),
-        ("Гьотеборг", "Рибена супа"),
-    ],
-    "🇭🇷 Хърватия": [
-        ("Загреб", "Балканска кухня"),
-        ("Сплит", "Морски дарове"),
-        ("Дубровник", "Далматинска кухня"),
-    ],
-    "🇵🇹 Португалия": [
-        ("Лисабон", "Бакаляу"),
-        ("Порто", "Франсезиня"),
-        ("Фаро", "Морски дарове"),
-    ],
-    "🇵🇱 Полша": [
-        ("Варшава", "Пиероги"),
-        ("Краков", "Журек"),
-        ("Гданск", "Рибни ястия"),
-    ],
-    "🇭🇺 Унгария": [
-        ("Будапеща", "Гулаш"),
-        ("Дебрецен", "Унгарска наденица"),
-    ],
-    "🇨🇭 Швейцария": [
-        ("Цюрих", "Фондю"),
-        ("Женева", "Раклет"),
-        ("Берн", "Швейцарска кухня"),
-    ],
-    "🇧🇪 Белгия": [
-        ("Брюксел", "Гофрети"),
-        ("Брюж", "Миди с пържени картофи"),
-        ("Антверпен", "Белгийски шоколад"),
-    ],
-    "🇷🇴 Румъния": [
-        ("Букурещ", "Сарми"),
-        ("Брашов", "Трансилванска кухня"),
-        ("Клуж-Напока", "Местни специалитети"),
-    ],
-    "🇩🇰 Дания": [
-        ("Копенхаген", "Смьоребрьод"),
-        ("Орхус", "Скандинавска кухня"),
-    ]
-}
-
-CITY_COORDS = {
-    "София": [42.6977, 23.3219],
-    "Берлин": [52.5200, 13.4050],
-    "Мюнхен": [48.1351, 11.5820],
-    "Хамбург": [53.5488, 9.9872],
-    "Кьолн": [50.9375, 6.9603],
-    "Париж": [48.8566, 2.3522],
-    "Лион": [45.7640, 4.8357],
-    "Марсилия": [43.2965, 5.3698],
-    "Ница": [43.7102, 7.2620],
-    "Рим": [41.9028, 12.4964],
-    "Флоренция": [43.7696, 11.2558],
-    "Венеция": [45.4408, 12.3155],
-    "Милано": [45.4642, 9.1900],
-    "Барселона": [41.3851, 2.1734],
-    "Мадрид": [40.4168, -3.7038],
-    "Валенсия": [39.4699, -0.3763],
-    "Севиля": [37.3891, -5.9845],
-    "Солун": [40.6401, 22.9444],
-    "Атина": [37.9838, 23.7275],
-    "Санторини": [36.3932, 25.4615],
-    "Виена": [48.2082, 16.3738],
-    "Залцбург": [47.8095, 13.0550],
-    "Инсбрук": [47.2692, 11.4041],
-    "Прага": [50.0755, 14.4378],
-    "Бърно": [49.1951, 16.6068],
-    "Амстердам": [52.3676, 4.9041],
-    "Ротердам": [51.9244, 4.4777],
-    "Стокхолм": [59.3293, 18.0686],
-    "Гьотеборг": [57.7089, 11.9746],
-    "Загреб": [45.8150, 15.9819],
-    "Сплит": [43.5081, 16.4402],
-    "Дубровник": [42.6507, 18.0944],
-    "Лисабон": [38.7223, -9.1393],
-    "Порто": [41.1579, -8.6291],
-    "Фаро": [37.0194, -7.9304],
-    "Варшава": [52.2297, 21.0122],
-    "Краков": [50.0647, 19.9450],
-    "Гданск": [54.3520, 18.6466],
-    "Будапеща": [47.4979, 19.0402],
-    "Дебрецен": [47.5316, 21.6273],
-    "Цюрих": [47.3769, 8.5417],
-    "Женева": [46.2044, 6.1432],
-    "Берн": [46.9480, 7.4474],
-    "Брюксел": [50.8503, 4.3517],
-    "Брюж": [51.2093, 3.2247],
-    "Антверпен": [51.2194, 4.4025],
-    "Букурещ": [44.4268, 26.1025],
-    "Брашов": [45.6579, 25.6012],
-    "Клуж-Напока": [46.7712, 23.6236],
-    "Копенхаген": [55.6761, 12.5683],
-    "Орхус": [56.1629, 10.2039],
-}
-
-CITY_IMAGES = {
-    "Берлин": "https://blog.karat-s.com/wp-content/uploads/2017/04/berlin-view.jpg",
-    "Мюнхен": "https://cdn.tripzaza.com/bg/destinations/wp-content/uploads/2018/07/Dostoprimechatelnosti-Myunhena-e1531368855353.jpg",
-    "Хамбург": "https://peika.bg/pictures/84183_715__3.jpg",
-    "Кьолн": "https://m.netinfo.bg/media/images/50860/50860414/991-ratio-kioln.jpg",
-
-    "Париж": "https://blog.citylines.eu/wp-content/uploads/2019/12/%D0%90%D0%B9%D1%84%D0%B5%D0%BB%D0%BE%D0%B2%D0%B0%D1%82%D0%B0-%D0%BA%D1%83%D0%BB%D0%B0-%D0%B5-%D0%B1%D0%B5%D0%B7%D0%BC%D1%8A%D0%BB%D0%B2%D0%B5%D0%BD-%D1%81%D0%B2%D0%B8%D0%B4%D0%B5%D1%82%D0%B5%D0%BB-%D0%BD%D0%B0-%D1%85%D0%B8%D0%BB%D1%8F%D0%B4%D0%B8-%D0%BF%D1%80%D0%B5%D0%B4%D0%BB%D0%BE%D0%B6%D0%B5%D0%BD%D0%B8%D1%8F-%D0%B7%D0%B0-%D0%B1%D1%80%D0%B0%D0%BA.jpg",
-    "Лион": "https://sabornamegdana.com/wp/wp-content/uploads/2025/04/vieux-lyon.jpg",
-    "Марсилия": "https://wonders-of-europe.bg/wp-content/uploads/2017/03/rsz_shutterstock_436865629.jpg",
-    "Ница": "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcRgGj_5uh0m0fsd4VdYccqRt_VbAnpokSHzcA&s",
-
-    "Рим": "https://upload.wikimedia.org/wikipedia/commons/thumb/d/de/Colosseo_2020.jpg/1200px-Colosseo_2020.jpg",
-    "Флоренция": "https://suntravel.bg/f/offers/xxl/0/f314d4dc13e643d8f059ef6ee91c9113.jpg",
-    "Венеция": "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQAQ-38WyZ5DXEN3VdUMVSz7huXnFRMTo8huw&s",
-    "Милано": "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcS1y0YkR8hZLGkQmoWAtejNqyvDwWPHOqbf5g&s",
-
-    "Барселона": "https://webtours.bg/img/barcelona-%D0%B1%D0%B0%D1%80%D1%81%D0%B5%D0%BB%D0%BE%D0%BD%D0%B0.jpg",
-    "Мадрид": "https://webtours.bg/img/%D0%B5%D0%BA%D1%81%D0%BA%D1%83%D1%80%D0%B7%D0%B8%D1%8F-%D0%BC%D0%B0%D0%B4%D1%80%D0%B8%D0%B4-%D0%B8%D1%81%D0%BF%D0%B0%D0%BD%D0%B8%D1%8F-%D1%83%D0%B5%D0%B1-%D1%82%D1%83%D1%80%D1%81-ekskurzia-madrid-ispania-web-tours.jpg",
-    "Валенсия": "https://balkannomad.com/wp-content/uploads/2023/10/shutterstock_2277659335-scaled.jpg",
-    "Севиля": "https://nasamnatam.com/pics/1241-bdee7ab778ed9347a1f51843366dd4ed.jpg",
-
-    "Солун": "https://neftelimov.com/wp-content/uploads/2022/10/img_7973-2-scaled.jpeg",
-    "Атина": "https://nasamnatam.com/pics/87-175b2ee109b2e657d250f36a9ed6d301.jpg",
-    "Санторини": "https://static.dw.com/image/57460904_605.jpg",
-
-    "Виена": "https://images.squarespace-cdn.com/content/v1/66c2f2dd14239c0a58c52faa/bb6e1eab-3375-4343-b383-0b7873319a23/%D0%94%D0%B2%D0%BE%D1%80%D0%B5%D1%86%D1%8A%D1%82+%D0%A8%D1%8C%D0%BE%D0%BD%D0%B1%D1%80%D1%83%D0%BD+%D0%B2%D1%8A%D0%B2+%D0%92%D0%B8%D0%B5%D0%BD%D0%B0%2C+%D0%90%D0%B2%D1%81%D1%82%D1%80%D0%B8%D1%8F.jpgy",
-    "Залцбург": "https://freshholiday.bg/img/NOVINI/BIG_5662_715__1738079265317.jpg",
-    "Инсбрук": "https://r-xx.bstatic.com/xdata/images/city/608x352/684028.webp?k=6e08ae5bad77cf17e69b5dd8e3d4c87c8fef704a0a787f4ef71f6563e5e4ff11&o=",
-
-    "Прага": "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcRHhmkTdrgvhuHa-knUKrsMKCEFopeKyiiw9g&s",
-    "Бърно": "https://momichetata.com/media/source/201907/1563960967_brno_1.jpg",
-
-    "Амстердам": "https://balkannomad.com/wp-content/uploads/2024/09/shutterstock_642423370-scaled.jpg",
-    "Ротердам": "https://static.dir.bg/uploads/images/2022/09/13/2393679/1366x768.jpg?_=1663075994",
-
-    "Стокхолм": "https://www.e-tours.bg/images/stockholm/c-fakepath-stocholm-3.jpg",
-    "Гьотеборг": "https://upload.wikimedia.org/wikipedia/commons/9/97/G%C3%B6teborg_2503_stitch_%2828573994096%29.jpg",
-
-    "Загреб": "https://freshholiday.bg/img/NOVINI/BIG_Zagreb_09.14_1702660819212.jpg.webp",
-    "Сплит": "https://upload.wikimedia.org/wikipedia/commons/a/ab/Split_080620-133710-IMG_0968x.jpg",
-    "Дубровник": "https://freshholiday.bg/img/NOVINI/BIG_dubrovnik_1717999865257.jpg.webp",
-
-    "Лисабон": "https://cdn2.bohemia.bg/touristsites/849164/LRWA53.jpg",
-    "Порто": "https://cdn2.bohemia.bg/touristsites/771171/R6LUNA.jpg",
-    "Фаро": "https://p1.elle.bg/i/s/istock-653375294-123294-1140x0.jpg",
-
-    "Варшава": "https://www.e-tours.bg/images/Warsaw/c-fakepath-old-town-3.jpg",
-    "Краков": "https://upload.wikimedia.org/wikipedia/commons/a/a3/Krakow_Rynek_Glowny_panorama_2.jpg",
-    "Гданск": "https://cdn2.bohemia.bg/touristsites/176108/8RZBFV.jpg",
-
-    "Будапеща": "https://savetite.com/wp-content/uploads/2023/09/budapeshta-zabelejitelnosti.jpg",
-    "Дебрецен": "https://upload.wikimedia.org/wikipedia/commons/0/0f/DebrecenUniversity3.jpg",
-
-    "Цюрих": "https://cdn.tripzaza.com/bg/destinations/wp-content/uploads/2018/07/Dostoprimechatelnosti-TSyuriha-e1531466241421.jpg",
-    "Женева": "https://cdn2.bohemia.bg/touristsites/545735/UNJYNA.jpg",
-    "Берн": "https://peika.bg/pictures/79736_715_.jpg",
-
-    "Брюксел": "https://i0.wp.com/bulgarianontheroad.com/wp-content/uploads/2024/12/img_4991-min-1.jpg?fit=1200%2C900&ssl=1",
-    "Брюж": "https://upload.wikimedia.org/wikipedia/commons/8/8f/Bruggewasser.jpg",
-    "Антверпен": "https://upload.wikimedia.org/wikipedia/commons/3/38/Amberes%3B_vistas_MAS_2.jpg",
-
-    "Букурещ": "https://balkannomad.com/wp-content/uploads/2025/08/shutterstock_2467711837-scaled.jpg",
-    "Брашов": "https://freshholiday.bg/img/NOVINI/BIG_brasov-romania_1709040104232.jpg.webp",
-    "Клуж-Напока": "https://upload.wikimedia.org/wikipedia/commons/7/78/CJROCluj-Napoca_19.jpg",
-
-    "Копенхаген": "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcRXOFPiXwF0rSWZ-6yJWH8Tupxx1_bgnNjv7g&s",
-    "Орхус": "https://foxiepass.com/blog/uploads/public/20240723/aarhus2_oZ09Fo.jpg",
-}
-
-
-CITY_RECOMMENDATIONS = {
-    "Берлин": "Бранденбургската врата и Музейния остров",
-    "Мюнхен": "разходка в Мариенплац и Английската градина",
-    "Хамбург": "пристанището и квартал Шпайхерщад",
-    "Кьолн": "Кьолнската катедрала",
-
-    "Париж": "Айфеловата кула и разходка край Сена",
-    "Лион": "стария град (Vieux Lyon)",
-    "Марсилия": "старото пристанище (Vieux-Port)",
-    "Ница": "крайбрежната алея Promenade des Anglais",
-
-    "Рим": "Колизеума и Форума",
-    "Флоренция": "катедралата Santa Maria del Fiore",
-    "Венеция": "площад Сан Марко и разходка с гондола",
-    "Милано": "катедралата Дуомо",
-
-    "Барселона": "Саграда Фамилия",
-    "Мадрид": "Кралския дворец",
-    "Валенсия": "Града на изкуствата и науките",
-    "Севиля": "площад Испания",
-
-    "Солун": "Бялата кула",
-    "Атина": "Акропола",
-    "Санторини": "залеза в Ия",
-
-    "Виена": "двореца Шьонбрун",
-    "Залцбург": "къщата на Моцарт",
-    "Инсбрук": "Златния покрив",
-
-    "Прага": "Карловия мост",
-    "Бърно": "замъка Шпилберк",
-
-    "Амстердам": "каналите и къщата на Ане Франк",
-    "Ротердам": "модерната архитектура и кубичните къщи",
-
-    "Стокхолм": "стария град Гамла Стан",
-    "Гьотеборг": "крайбрежието и архипелага",
+clock.lap("setup")
 
-    "Загреб": "стария град Горни град",
-    "Сплит": "двореца на Диоклециан",
-    "Дубровник": "разходка по градските стени",
-
-    "Лисабон": "квартал Алфама",
-    "Порто": "дегустация на портвайн край реката",
-    "Фаро": "лагуната Риа Формоза",
-
-    "Варшава": "стария град",
-    "Краков": "площада Ринек Главни",
-    "Гданск": "старото пристанище",
-
-    "Будапеща": "Парламента и баните Сечени",
-    "Дебрецен": "Голямата реформаторска църква",
-
-    "Цюрих": "разходка край езерото",
-    "Женева": "фонтана Jet d’Eau",
-    "Берн": "стария град (UNESCO)",
-
-    "Брюксел": "Гран Плас",
-    "Брюж": "средновековните канали",
-    "Антверпен": "катедралата и диамантения квартал",
-
-    "Букурещ": "Двореца на парламента",
-    "Брашов": "Черната църква",
-    "Клуж-Напока": "централния площад",
-
-    "Копенхаген": "Нюхавн",
-    "Орхус": "музея ARoS"
-}
-
-HOTEL_PRICES = {
-    "🏠 Бюджетен хотел": 60,
-    "🏨 Комфортен хотел": 100,
-    "🏰 Луксозен хотел": 170,
-}
-
-DISTANCE_BETWEEN_CITIES = 300
-
-# ================== TRANSPORT ==================
-
-class Transport(ABC):
-    def __init__(self, price_per_km, speed):
-        self.price_per_km = price_per_km
-        self.speed = speed
-
-    def travel_cost(self, distance):
-        return distance * self.price_per_km
+# ================== DATA ==================
 
-    def travel_time(self, distance):
-        return distance / self.speed
+catalog = get_catalog()
 
-    @abstractmethod
-    def name(self):
-        pass
+# ================== IMAGES ==================
 
-class Car(Transport):
-    def __init__(self):
-        super().__init__(0.25, 80)
-    def name(self):
-        return "🚗 Кола"
+@st.cache_resource
+def get_image_cache():
+    # Снимките се теглят във фонов режим още при първото стартиране
+    cache = ImageCache()
+    cache.prefetch([city.image for city in get_catalog().rows if city.image])
+    return cache
 
-class Train(Transport):
-    def __init__(self):
-        super().__init__(0.18, 110)
-    def name(self):
-        return "🚆 Влак"
+image_cache = get_image_cache()
 
-class Plane(Transport):
-    def __init__(self):
-        super().__init__(0.45, 600)
-    def name(self):
-        return "✈️ Самолет"
+clock.lap("data")
 
 # ================== UI ==================
 
@@ -358,10 +79,10 @@ st.sidebar.header("🧭 Настройки на пътуването")
 
 country = st.sidebar.selectbox(
     "🌐 Избери държава за посещение",
-    list(DESTINATIONS.keys())
+    catalog.countries
 )
 
-max_cities = len(DESTINATIONS[country])
+max_cities = len(catalog.by_country[country])
 
 num_cities = st.sidebar.slider(
     "🏙️ Колко града искаш да посетиш?",
@@ -370,124 +91,268 @@ num_cities = st.sidebar.slider(
     min(3, max_cities)
 )
 
-transport_choice = st.sidebar.radio(
-    "🚘 Как ще пътуваш?",
-    ["Кола", "Влак", "Самолет"]
-)
-
-hotel_type = st.sidebar.radio(
-    "🛏️ Предпочитан тип настаняване",
-    list(HOTEL_PRICES.keys())
-)
+optimize = st.sidebar.checkbox("🔀 Оптимизирай реда на градовете", value=True)
 
-days = st.sidebar.slider("📆 Продължителност (дни)", 2, 21, 7)
-budget = st.sidebar.number_input("💰 Твоят бюджет (лв)", 500, 30000, 4000)
+# Транспортът и настройките на цената се рисуват тук от фрагмента по-долу
+cost_settings = st.sidebar.container()
 
 plan = st.sidebar.button("🧭 Планирай пътуването")
 
+debug = st.sidebar.checkbox("🛠️ Метрики за производителност")
+
+clock.lap("ui")
+
+
+@st.cache_data(max_entries=256)
+def get_risk(hotel_price, food_price, stops, days, transport_cost, budget, scenarios, seed):
+    return simulate_budget(hotel_price, food_price, stops, days, transport_cost, budget, scenarios, seed)
+
+
+search_area = st.container()
+
 # ================== PLANNING ==================
 
 if plan:
-    selected_cities = ["София"] + [
-        city for city, _ in DESTINATIONS[country][:num_cities]
-    ]
+    selected_cities, route = get_route(country, num_cities, optimize)
 
     st.subheader("🗺️ Твоят маршрут")
     st.markdown(" ** ➡️ ".join(selected_cities) + "**")
+    if optimize:
+        method = "точен" if route.method == "exact" else "евристичен"
+        st.caption(f"⏱️ Оптимален ред ({method} алгоритъм) за {route.solve_ms:.1f} ms")
+
+    clock.lap("route")
 
     # ================== MAP ==================
 
-    points = pd.DataFrame([
-        {"lat": CITY_COORDS[c][0], "lon": CITY_COORDS[c][1]}
-        for c in selected_cities
-    ])
-
-    lines = pd.DataFrame([
-        {
-            "from_lon": CITY_COORDS[selected_cities[i]][1],
-            "from_lat": CITY_COORDS[selected_cities[i]][0],
-            "to_lon": CITY_COORDS[selected_cities[i+1]][1],
-            "to_lat": CITY_COORDS[selected_cities[i+1]][0],
-        }
-        for i in range(len(selected_cities)-1)
-    ])
-
-    deck = pdk.Deck(
-        layers=[
-            pdk.Layer(
-                "LineLayer",
-                data=lines,
-                get_source_position="[from_lon, from_lat]",
-                get_target_position="[to_lon, to_lat]",
-                get_color=[215, 38, 61],
-                get_width=4
-            ),
-            pdk.Layer(
-                "ScatterplotLayer",
-                data=points,
-                get_position="[lon, lat]",
-                get_radius=900,
-                radius_min_pixels=4,
-                radius_max_pixels=10,
-                get_fill_color=[50, 130, 200],
-                pickable=True
-            ),
-        ],
-        initial_view_state=pdk.ViewState(
-            latitude=points["lat"].mean(),
-            longitude=points["lon"].mean(),
-            zoom=4
-        )
-    )
+    deck = get_deck(selected_cities)
 
     st.pydeck_chart(deck)
+    clock.lap("map")
 
     # ================== DETAILS ==================
 
     st.subheader("📍 Градове и преживявания")
 
-    hotel_price = HOTEL_PRICES[hotel_type]
-    food_price = 30
+    spatial = get_spatial_index()
+    nearby_route = spatial.near_route(selected_cities, NEARBY_KM, NEARBY_ROUTE_STOPS)
+    if nearby_route:
+        st.caption(
+            f"📌 До {NEARBY_KM} км от маршрута: "
+            + ", ".join(f"{name} ({km:.0f} км)" for name, km in nearby_route)
+        )
 
-    total_food = 0
-    total_hotel = 0
-    
     for city in selected_cities[1:]:
-        food = next(food for c, food in DESTINATIONS[country] if c == city)
-    
-        with st.expander(city):
-            if city in CITY_IMAGES:
-                st.image(CITY_IMAGES[city], use_column_width=True)
+        info = catalog.city(city)
 
-            st.write(f"🏨 **{hotel_type}:** {hotel_price} лв / нощ")
-            st.write(f"🍽️ **Традиционна храна:** {food}")
-            recommendation = CITY_RECOMMENDATIONS.get(city, "разходка и опознаване на града")
+        with st.expander(city):
+            if info.image:
+                # Не се чака мрежата: докато снимката не е в кеша, браузърът я тегли по URL
+                image = image_cache.get(info.image, wait=0)
+                st.image(image or info.image, width="stretch")
+
+            if info.food:
+                st.write(f"🍽️ **Традиционна храна:** {info.food}")
+            recommendation = info.recommendation or "разходка и опознаване на града"
             st.write(f"🏛️ **Препоръка:** {recommendation}")
 
+            nearby = spatial.nearest(city, NEARBY_STOPS, exclude=selected_cities)
+            if nearby:
+                st.write("➕ **Наблизо:** " + ", ".join(f"{name} ({km:.0f} км)" for name, km in nearby))
 
-        total_food += food_price * days
-        total_hotel += hotel_price * days
-
-
-    # ================== SUMMARY ==================
+    clock.lap("details")
 
-    transport = Car() if transport_choice == "Кола" else Train() if transport_choice == "Влак" else Plane()
+costs_area = st.container()
 
-    distance = DISTANCE_BETWEEN_CITIES * (len(selected_cities) - 1)
-    total_cost = total_food + total_hotel + transport.travel_cost(distance)
+# ================== COSTS ==================
 
-    st.subheader("💰 Обобщение")
+@st.fragment
+def trip_costs(country, num_cities, optimize, planned, search_area, costs_area):
+    # Смяна на транспорт, хотел, дни, бюджет и т.н. презарежда само този
+    # фрагмент: редът на градовете не зависи от тях, така че маршрутът,
+    # картата и снимките отгоре остават непокътнати
+    clock = METRICS.stopwatch()
 
-    st.write(f"{transport.name()} – {transport.travel_cost(distance):.2f} лв")
-    st.write(f"🏨 Настаняване: {total_hotel:.2f} лв")
-    st.write(f"🍽️ Храна: {total_food:.2f} лв")
-
-    st.markdown("---")
-    st.markdown(f"## 💵 Обща сума: **{total_cost:.2f} лв**")
+    transport_choice = st.radio(
+        "🚘 Как ще пътуваш?",
+        list(TRANSPORTS)
+    )
 
-    if total_cost <= budget:
-        st.success("✅ Пътуването е в рамките на бюджета")
-    else:
-        st.error("❌ Надвишава бюджета")
+    hotel_type = st.radio(
+        "🛏️ Предпочитан тип настаняване",
+        list(HOTEL_PRICES.keys())
+    )
 
-    st.info(f"🎲 Случайно събитие: {random.choice(['🎉 Фестивал', '🌧️ Дъждовен ден', '💸 Неочаквана отстъпка'])}")
+    days = st.slider("📆 Продължителност (дни)", 2, 21, 7)
+    budget = st.number_input("💰 Твоят бюджет (лв)", 500, 30000, 4000)
+    compare = st.checkbox("⚖️ Сравни цена и време за път")
+    multimodal = st.checkbox("🔁 Различен транспорт за всяка отсечка")
+    time_value = st.slider("⏳ Колко струва един час път? (лв)", 0, 100, 20) if multimodal else 0
+    dates = st.checkbox("📅 Намери най-евтината начална дата")
+
+    with st.expander("🎲 Симулация на риска"):
+        scenarios = st.select_slider("Брой сценарии", [10_000, 100_000, 300_000, 1_000_000], 100_000)
+        seed = st.number_input("Seed", 0, 1_000_000, 0)
+
+    find = st.button("💡 Намери пътувания в бюджета")
+
+    clock.lap("costs_ui")
+
+    # ================== BUDGET SEARCH ==================
+
+    if find:
+        with search_area:
+            st.subheader("💡 Пътувания, които се вписват в бюджета")
+            trips = search_trips(
+                get_prefix_routes(optimize),
+                get_transports(),
+                HOTEL_PRICES,
+                FOOD_PRICE,
+                budget
+            )
+            if trips.empty:
+                st.warning("Няма пътуване, което се вписва в този бюджет")
+            else:
+                st.dataframe(trips, hide_index=True)
+        clock.lap("search")
+
+    if not planned:
+        clock.finish("costs")
+        return
+
+    trip = get_plan(country, num_cities, transport_choice, hotel_type, days, optimize)
+    selected_cities = trip.cities
+
+    with costs_area:
+
+        # ================== SUMMARY ==================
+
+        st.subheader("💰 Обобщение")
+
+        st.write(f"{trip.transport.name()} – {trip.transport_cost:.2f} лв")
+        st.write(f"📏 Разстояние: {trip.distance:.0f} км ({trip.travel_hours:.1f} ч път)")
+        st.write(f"🏨 Настаняване ({hotel_type}, {trip.hotel_price} лв / нощ): {trip.total_hotel:.2f} лв")
+        st.write(f"🍽️ Храна: {trip.total_food:.2f} лв")
+
+        st.markdown("---")
+        st.markdown(f"## 💵 Обща сума: **{trip.total_cost:.2f} лв**")
+
+        if trip.fits(budget):
+            st.success("✅ Пътуването е в рамките на бюджета")
+        else:
+            st.error("❌ Надвишава бюджета")
+
+        risk = get_risk(trip.hotel_price, trip.food_price, len(selected_cities) - 1, days, trip.transport_cost, budget, scenarios, seed)
+        q = risk["quantiles"]
+        st.info(
+            f"🎲 Шанс да останеш в бюджета: **{risk['p_within_budget']:.0%}** "
+            f"при {scenarios:,} сценария с 🎉 фестивали, 🌧️ дъждовни дни и 💸 отстъпки"
+        )
+        st.caption(
+            f"Очаквана сума {risk['mean']:.0f} лв · медиана {q[0.5]:.0f} лв · "
+            f"90% интервал {q[0.05]:.0f}–{q[0.95]:.0f} лв · p99 {q[0.99]:.0f} лв"
+        )
+        clock.lap("summary")
+
+        # ================== MULTIMODAL ==================
+
+        if multimodal:
+            st.subheader("🔁 Комбиниран транспорт")
+            segments = get_leg_planner().plan_legs(selected_cities, time_value)
+            st.dataframe(
+                [
+                    {
+                        "От": s.start,
+                        "До": s.end,
+                        "Транспорт": s.mode,
+                        "Разстояние (км)": round(s.km),
+                        "Цена (лв)": round(s.cost, 2),
+                        "Време (ч)": round(s.hours, 1),
+                    }
+                    for s in segments
+                ],
+                hide_index=True
+            )
+            legs_cost = sum(s.cost for s in segments)
+            legs_hours = sum(s.hours for s in segments)
+            multimodal_total = trip.total_food + trip.total_hotel + legs_cost
+            st.write(f"🧳 Транспорт: {legs_cost:.2f} лв · {legs_hours:.1f} ч път")
+            st.markdown(f"**💵 Обща сума с комбиниран транспорт: {multimodal_total:.2f} лв**")
+            clock.lap("multimodal")
+
+        # ================== COMPARE ==================
+
+        if compare:
+            st.subheader("⚖️ Цена срещу време за път")
+            options = compare_options(
+                trip.distance,
+                len(selected_cities) - 1,
+                days,
+                get_transports(),
+                HOTEL_PRICES,
+                FOOD_PRICE
+            )
+            st.caption("Парето-оптимални са вариантите, за които няма едновременно по-евтин и по-бърз")
+            st.scatter_chart(options, x="Време за път (ч)", y="Обща сума", color="Парето")
+            st.dataframe(options, hide_index=True)
+            clock.lap("compare")
+
+        # ================== DATES ==================
+
+        if dates:
+            import pandas as pd
+
+            st.subheader("📅 Най-евтина начална дата")
+            prices = get_price_table()
+            stops = selected_cities[1:]
+            starts, stay_costs = prices.start_date_costs(stops, trip.hotel_price, days)
+            if not len(starts):
+                st.warning("Пътуването е по-дълго от ценовия календар")
+            else:
+                best = int(stay_costs.argmin())
+                best_total = stay_costs[best] + trip.transport_cost
+                st.write(
+                    f"🗓️ Тръгни на **{starts[best].astype(object):%d.%m.%Y}** – "
+                    f"обща сума **{best_total:.2f} лв** "
+                    f"(с {float(np.median(stay_costs) - stay_costs[best]):.0f} лв под медианата за сезона)"
+                )
+                st.caption(f"Цени за нощувка и храна по дати за {len(stops)} града, {days} дни във всеки")
+                st.line_chart(pd.DataFrame({"Настаняване и храна (лв)": stay_costs}, index=starts))
+            clock.lap("dates")
+
+    clock.finish("costs")
+
+
+with cost_settings:
+    trip_costs(country, num_cities, optimize, plan, search_area, costs_area)
+
+clock.finish()
+
+# ================== METRICS ==================
+
+if METRICS_FILE:
+    METRICS.write_prometheus(METRICS_FILE, CACHES)
+
+if debug:
+    with st.sidebar.expander("🛠️ Метрики за производителност", expanded=True):
+        st.caption("Времена по секции в ms (последните 1000 rerun-а)")
+        st.dataframe(
+            [
+                {
+                    "Секция": name,
+                    "Брой": stats["count"],
+                    "p50": round(stats["p50"] * 1000, 2),
+                    "p95": round(stats["p95"] * 1000, 2),
+                    "p99": round(stats["p99"] * 1000, 2),
+                }
+                for name, stats in METRICS.summary().items()
+            ],
+            hide_index=True
+        )
+        for label, cache in CACHES.items():
+            stats = cache.stats()
+            st.caption(
+                f"{label}: {stats['size']}/{stats['maxsize']} · попадения {stats['hits']} · "
+                f"пропуски {stats['misses']} · изгонени {stats['evictions']} · изтекли {stats['expirations']} · "
+                f"{stats['hit_rate']:.0%}"
+            )
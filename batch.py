@@ -0,0 +1,98 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from multiprocessing import Pool
+
+from engine import get_distance_matrix, get_plan
+
+# ================== BATCH ==================
+#
+# Планиране на много пътувания без Streamlit:
+#   python batch.py requests.jsonl -o plans.jsonl --workers 4
+#
+# Всеки ред от входа съдържа country, num_cities, transport, hotel_type,
+# days, budget и по желание optimize (по подразбиране true).
+
+TRUE_VALUES = {"1", "true", "yes", "да"}
+
+
+def read_requests(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                # Счупен ред става ред с грешка, а не спира целия batch
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"error": f"line {number}: {e}"}
+                    continue
+                yield row if isinstance(row, dict) else {"error": f"line {number}: expected a JSON object"}
+
+
+def parse_request(row):
+    optimize = row.get("optimize", True)
+    if isinstance(optimize, str):
+        optimize = optimize.strip().lower() in TRUE_VALUES
+    return {
+        "country": row["country"],
+        "num_cities": int(row["num_cities"]),
+        "transport_choice": row["transport"],
+        "hotel_type": row["hotel_type"],
+        "days": int(row["days"]),
+        "optimize": bool(optimize),
+    }
+
+
+def run_request(row):
+    if "error" in row:
+        return {"error": row["error"]}
+    try:
+        trip = get_plan(**parse_request(row))
+        budget = float(row["budget"])
+        result = trip.to_dict()
+        result["budget"] = budget
+        result["within_budget"] = trip.fits(budget)
+    except (KeyError, ValueError, TypeError) as e:
+        result = {"error": str(e)}
+    if "id" in row:
+        result["id"] = row["id"]
+    return result
+
+
+def warm_up():
+    # Всеки worker зарежда каталога и координатите веднъж при старт
+    get_distance_matrix()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch trip planner")
+    parser.add_argument("input", help="JSONL or CSV file with trip requests")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    started = time.perf_counter()
+    count = 0
+    try:
+        with Pool(args.workers, initializer=warm_up) as pool:
+            for result in pool.imap(run_request, read_requests(args.input), chunksize=args.chunksize):
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"{count} plans in {elapsed:.2f}s ({count / elapsed:.0f} plans/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import gc
+import itertools
+import time
+import tracemalloc
+
+from common import APP_PATH, environment, percentile, save_results
+
+from streamlit.testing.v1 import AppTest
+
+import engine
+import maps
+from catalog import get_catalog
+from data import HOTEL_PRICES
+from transport import TRANSPORTS
+
+# ================== APP BENCHMARK ==================
+#
+# Пуска app.py през AppTest за всяка държава с максимален брой градове,
+# всеки транспорт и всеки тип хотел. За всеки rerun записва времето,
+# пиковата памет (tracemalloc) и размера на pydeck JSON-а.
+#
+#   python benchmarks/bench_app.py [--cold] [--limit N] [-o results.json]
+
+
+def widget(elements, label_prefix):
+    return next(w for w in elements if w.label.startswith(label_prefix))
+
+
+def configure(at, country, transport, hotel):
+    widget(at.sidebar.selectbox, "🌐").set_value(country)
+    at.run()
+    slider = widget(at.sidebar.slider, "🏙️")
+    slider.set_value(slider.max)
+    widget(at.sidebar.radio, "🚘").set_value(transport)
+    widget(at.sidebar.radio, "🛏️").set_value(hotel)
+    widget(at.sidebar.button, "🧭").click()
+
+
+def deck_payload_size(at):
+    charts = at.get("deck_gl_json_chart")
+    return sum(len(chart.proto.json.encode("utf-8")) for chart in charts)
+
+
+def run(cold=False, limit=None, timeout=60):
+    catalog = get_catalog()
+    combos = list(itertools.product(catalog.countries, TRANSPORTS, HOTEL_PRICES))
+    if limit:
+        combos = combos[:limit]
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    started = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - started
+
+    runs = []
+    tracemalloc.start()
+    for country, transport, hotel in combos:
+        if cold:
+            engine.PLAN_CACHE.clear()
+            maps.DECK_CACHE.clear()
+        configure(at, country, transport, hotel)
+        gc.collect()
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        at.run()
+        wall = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        if at.exception:
+            raise RuntimeError(f"{country}/{transport}/{hotel}: {at.exception[0].value}")
+        runs.append({
+            "country": country,
+            "transport": transport,
+            "hotel": hotel,
+            "num_cities": len(catalog.by_country[country]),
+            "wall_s": wall,
+            "peak_bytes": peak,
+            "deck_bytes": deck_payload_size(at),
+        })
+    tracemalloc.stop()
+
+    walls = [r["wall_s"] for r in runs]
+    return {
+        "first_run_s": first_run,
+        "cold": cold,
+        "summary": {
+            "runs": len(runs),
+            "wall_p50_s": percentile(walls, 0.5),
+            "wall_p95_s": percentile(walls, 0.95),
+            "wall_max_s": max(walls) if walls else None,
+            "peak_bytes_max": max((r["peak_bytes"] for r in runs), default=None),
+            "deck_bytes_max": max((r["deck_bytes"] for r in runs), default=None),
+        },
+        "runs": runs,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app.py reruns through AppTest")
+    parser.add_argument("--cold", action="store_true", help="clear plan/deck caches before every rerun")
+    parser.add_argument("--limit", type=int, help="only run the first N combinations")
+    parser.add_argument("-o", "--output", help="JSON output path (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    payload = {"env": environment(), "app": run(cold=args.cold, limit=args.limit)}
+    path = save_results("app", payload, args.output)
+
+    summary = payload["app"]["summary"]
+    print(
+        f"{summary['runs']} reruns · p50 {summary['wall_p50_s'] * 1000:.1f} ms · "
+        f"p95 {summary['wall_p95_s'] * 1000:.1f} ms · peak {summary['peak_bytes_max'] / 1024:.0f} KiB · "
+        f"deck {summary['deck_bytes_max']} B"
+    )
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+
+from common import environment, measure, save_results
+
+from catalog import get_catalog
+from data import FOOD_PRICE, HOTEL_PRICES
+from distances import DistanceMatrix
+from engine import get_distance_matrix, get_prefix_routes, get_route, plan_trip
+from maps import build_deck, get_base_layer
+from search import search_trips
+from transport import TRANSPORTS
+
+# ================== CORE MICROBENCHMARKS ==================
+#
+# Смятане на цените и подготовка на данните за картата, без Streamlit.
+#
+#   python benchmarks/bench_core.py [--repeat N] [-o results.json]
+
+
+def largest_country(catalog):
+    return max(catalog.countries, key=lambda c: len(catalog.by_country[c]))
+
+
+def run(repeat=5):
+    catalog = get_catalog()
+    country = largest_country(catalog)
+    num_cities = len(catalog.by_country[country])
+    transport = next(iter(TRANSPORTS))
+    hotel = next(iter(HOTEL_PRICES))
+    trip = plan_trip(country, num_cities, transport, hotel, 7)
+    transports = [cls() for cls in TRANSPORTS.values()]
+    routes = get_prefix_routes(True)
+    get_distance_matrix()
+
+    cases = {
+        "distance_matrix_build": lambda: DistanceMatrix(catalog.names, catalog.lat, catalog.lon),
+        # Маршрутът се кешира на процес; изчиства се, за да се мери решаването
+        "plan_trip_optimized": lambda: (get_route.cache_clear(), plan_trip(country, num_cities, transport, hotel, 7, True)),
+        "plan_trip_listed_order": lambda: (get_route.cache_clear(), plan_trip(country, num_cities, transport, hotel, 7, False)),
+        "plan_trip_cached_route": lambda: plan_trip(country, num_cities, transport, hotel, 7, True),
+        "route_length": lambda: get_distance_matrix().route_length(trip.cities),
+        "search_trips": lambda: search_trips(routes, transports, HOTEL_PRICES, FOOD_PRICE, 4000),
+        "map_build_deck": lambda: build_deck(trip.cities),
+        "map_base_layer": lambda: get_base_layer.__wrapped__(),
+    }
+
+    results = {name: measure(fn, repeat) for name, fn in cases.items()}
+    return {"country": country, "num_cities": num_cities, "cases": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for cost math and map data")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="JSON output path (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    payload = {"env": environment(), "core": run(args.repeat)}
+    path = save_results("core", payload, args.output)
+
+    for name, stats in payload["core"]["cases"].items():
+        print(f"{name:28s} {stats['median_s'] * 1e6:10.1f} µs")
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+import pydeck as pdk
+
+from common import environment, measure, save_results
+
+from maps import DeckSpec, deck_json, path_layer, positions, scatter_layer
+
+# ================== MAP PAYLOAD ==================
+#
+# Размер на JSON за картата и време за сглобяването му: предишният подход
+# (DataFrame от dict за всеки ред + pdk.Deck.to_json) срещу колоните
+# [lon, lat] от maps.py с готов слой за каталога. Координатите са
+# синтетични, за да се стигне до маршрути и каталози по-големи от cities.db.
+#
+#   python benchmarks/bench_map.py [--repeat N] [-o results.json]
+
+# (спирки в маршрута, градове в каталога)
+SCENARIOS = [(5, 51), (50, 1_000), (500, 10_000)]
+
+
+def synthetic_coords(n, rng):
+    # Приблизително Европа
+    return rng.uniform(36, 60, n), rng.uniform(-10, 30, n)
+
+
+def legacy_deck(route_lat, route_lon, catalog_lat, catalog_lon):
+    # Както беше в maps.py: по един dict на ред, DataFrame и pdk.Deck при всеки rerun
+    coords = list(zip(route_lat.tolist(), route_lon.tolist()))
+    points = pd.DataFrame([{"lat": lat, "lon": lon} for lat, lon in coords])
+    lines = pd.DataFrame([
+        {
+            "from_lon": coords[i][1],
+            "from_lat": coords[i][0],
+            "to_lon": coords[i + 1][1],
+            "to_lat": coords[i + 1][0],
+        }
+        for i in range(len(coords) - 1)
+    ])
+    catalog = pd.DataFrame([{"lat": lat, "lon": lon} for lat, lon in zip(catalog_lat.tolist(), catalog_lon.tolist())])
+
+    deck = pdk.Deck(
+        layers=[
+            pdk.Layer("ScatterplotLayer", data=catalog, get_position="[lon, lat]", get_radius=600,
+                      radius_min_pixels=2, radius_max_pixels=4, get_fill_color=[160, 160, 160, 120]),
+            pdk.Layer("LineLayer", data=lines, get_source_position="[from_lon, from_lat]",
+                      get_target_position="[to_lon, to_lat]", get_color=[215, 38, 61], get_width=4),
+            pdk.Layer("ScatterplotLayer", data=points, get_position="[lon, lat]", get_radius=900,
+                      radius_min_pixels=4, radius_max_pixels=10, get_fill_color=[50, 130, 200], pickable=True),
+        ],
+        initial_view_state=pdk.ViewState(latitude=points["lat"].mean(), longitude=points["lon"].mean(), zoom=4),
+    )
+    return deck.to_json()
+
+
+def base_layer(catalog_lat, catalog_lon):
+    return scatter_layer("catalog", positions(catalog_lon, catalog_lat), getRadius=600, radiusMinPixels=2,
+                         radiusMaxPixels=4, getFillColor=[160, 160, 160, 120])
+
+
+def compact_deck(route_lat, route_lon, base):
+    # Същото като maps.build_deck, но с подадени координати
+    coords = positions(route_lon, route_lat)
+    layers = [
+        base,
+        path_layer("route", coords, getColor=[215, 38, 61], getWidth=4, widthUnits="pixels"),
+        scatter_layer("stops", coords, getRadius=900, radiusMinPixels=4, radiusMaxPixels=10,
+                      getFillColor=[50, 130, 200], pickable=True),
+    ]
+    return DeckSpec(deck_json(layers, route_lat, route_lon)).to_json()
+
+
+def run(repeat=5, seed=0):
+    rng = np.random.default_rng(seed)
+    scenarios = {}
+    summary = {}
+    for stops, cities in SCENARIOS:
+        route_lat, route_lon = synthetic_coords(stops, rng)
+        catalog_lat, catalog_lon = synthetic_coords(cities, rng)
+        base = base_layer(catalog_lat, catalog_lon)
+
+        cases = {
+            "legacy": lambda: legacy_deck(route_lat, route_lon, catalog_lat, catalog_lon),
+            # Слоят на каталога се сглобява наново - първата карта в процеса
+            "compact_cold": lambda: compact_deck(route_lat, route_lon, base_layer(catalog_lat, catalog_lon)),
+            # Слоят на каталога е готов - всеки следващ rerun
+            "compact": lambda: compact_deck(route_lat, route_lon, base),
+        }
+        name = f"{stops}x{cities}"
+        result = {}
+        for case, fn in cases.items():
+            stats = measure(fn, repeat)
+            stats["bytes"] = len(fn().encode("utf-8"))
+            result[case] = stats
+            summary[f"{name}.{case}_s"] = stats["median_s"]
+            summary[f"{name}.{case}_bytes"] = stats["bytes"]
+        scenarios[name] = result
+    return {"scenarios": scenarios, "summary": summary}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Map payload size and serialize time, legacy vs compact")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-o", "--output", help="JSON output path (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    payload = {"env": environment(), "map": run(args.repeat)}
+    path = save_results("map", payload, args.output)
+
+    print(f"{'stops x cities':16s} {'case':14s} {'time':>12s} {'payload':>12s}")
+    for name, cases in payload["map"]["scenarios"].items():
+        for case, stats in cases.items():
+            print(f"{name:16s} {case:14s} {stats['median_s'] * 1000:9.2f} ms {stats['bytes'] / 1024:9.1f} KiB")
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import json
+import subprocess
+import sys
+
+from common import APP_PATH, ROOT, environment, percentile, save_results
+
+# ================== STARTUP ==================
+#
+# Студен старт на нов процес: време до първото рисуване на app.py (само
+# sidebar-а), време до първия план и кои модули се внасят във всяка фаза.
+# Всеки опит е отделен процес с python -X importtime.
+#
+#   python benchmarks/bench_startup.py [--runs N] [-o results.json]
+
+HEAVY_MODULES = ("numpy", "pandas", "pydeck", "pyarrow")
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+ready = time.perf_counter()
+
+print("@@render", file=sys.stderr, flush=True)
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+rendered = time.perf_counter()
+loaded = [m for m in sys.argv[2:] if m in sys.modules]
+
+print("@@plan", file=sys.stderr, flush=True)
+next(b for b in at.sidebar.button if b.label.startswith("🧭")).click().run()
+planned = time.perf_counter()
+
+print(json.dumps({
+    "streamlit_import_s": ready - started,
+    "first_render_s": rendered - ready,
+    "first_plan_s": planned - rendered,
+    "heavy_at_first_render": loaded,
+    "errors": [e.value for e in at.exception],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    # Само модулите от най-горно ниво във всяка фаза; вложените са в cumulative
+    phases = {"startup": {}, "render": {}, "plan": {}}
+    phase = "startup"
+    for line in stderr.splitlines():
+        if line.startswith("@@"):
+            phase = line[2:]
+            continue
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            continue
+        phases[phase][name.strip()] = int(cumulative) / 1e6
+    return phases
+
+
+def run_once():
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, APP_PATH, *HEAVY_MODULES],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def run(runs=5):
+    samples = [run_once() for _ in range(runs)]
+
+    modules = {}
+    for phase in ("render", "plan"):
+        names = {name for s in samples for name in s["imports"][phase]}
+        modules[phase] = {
+            name: percentile([s["imports"][phase].get(name, 0.0) for s in samples], 0.5)
+            for name in names
+        }
+
+    summary = {
+        "streamlit_import_s": percentile([s["streamlit_import_s"] for s in samples], 0.5),
+        "first_render_s": percentile([s["first_render_s"] for s in samples], 0.5),
+        "first_plan_s": percentile([s["first_plan_s"] for s in samples], 0.5),
+        "render_import_s": sum(modules["render"].values()),
+        "plan_import_s": sum(modules["plan"].values()),
+    }
+    return {
+        "runs": runs,
+        "summary": summary,
+        "heavy_at_first_render": samples[0]["heavy_at_first_render"],
+        "errors": sorted({e for s in samples for e in s["errors"]}),
+        "modules": modules,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start: time to first render and import time per module")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--top", type=int, default=10, help="modules to print per phase")
+    parser.add_argument("-o", "--output", help="JSON output path (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    payload = {"env": environment(), "startup": run(args.runs)}
+    path = save_results("startup", payload, args.output)
+
+    startup = payload["startup"]
+    for name, value in startup["summary"].items():
+        print(f"{name:24s} {value * 1000:10.1f} ms")
+    print(f"heavy modules at first render: {', '.join(startup['heavy_at_first_render']) or 'none'}")
+    for phase, modules in startup["modules"].items():
+        print(f"\nimports during {phase}:")
+        for name, seconds in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {name:28s} {seconds * 1000:10.1f} ms")
+    if startup["errors"]:
+        print(f"\nerrors: {startup['errors']}", file=sys.stderr)
+    print(f"saved {path}")
+
+
+if __name__ == "__main__":
+    main()
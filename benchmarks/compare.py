@@ -0,0 +1,52 @@
+import argparse
+import json
+
+# ================== COMPARE ==================
+#
+# Сравнява два JSON резултата от бенчмарките (напр. от два commit-а).
+#
+#   python benchmarks/compare.py old.json new.json [--threshold 0.1]
+
+
+def flatten(payload):
+    metrics = {}
+    if "core" in payload:
+        for name, stats in payload["core"]["cases"].items():
+            metrics[f"core.{name}.median_s"] = stats["median_s"]
+    for section in ("app", "load", "startup", "map"):
+        summary = payload.get(section, {}).get("summary", {})
+        for name, value in summary.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metrics[f"{section}.{name}"] = value
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change that counts as a regression")
+    args = parser.parse_args(argv)
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    old_metrics, new_metrics = flatten(old), flatten(new)
+    print(f"{old['env']['commit']} -> {new['env']['commit']}")
+
+    regressions = 0
+    for name in sorted(set(old_metrics) & set(new_metrics)):
+        before, after = old_metrics[name], new_metrics[name]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:40s} {before:14.6g} {after:14.6g} {change:+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
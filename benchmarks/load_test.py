@@ -0,0 +1,167 @@
+import argparse
+import os
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common import APP_PATH, environment, percentile, save_results
+
+from streamlit.testing.v1 import AppTest
+
+from catalog import get_catalog
+from data import HOTEL_PRICES
+from transport import TRANSPORTS
+
+# ================== LOAD TEST ==================
+#
+# Симулира N сесии срещу app.py. Всяка сесия е отделен AppTest, който
+# повтаря реалистична поредица от действия в sidebar-а. Както при истински
+# сървър, сесиите делят един процес: всеки worker държи своя дял от
+# сесиите живи и ги редува стъпка по стъпка (AppTest подменя глобалния
+# Runtime при всеки run, затова в един процес те не вървят в отделни
+# нишки). Паметта е ръстът на RSS на процеса, разделен на броя сесии в
+# него. Първият (студен) run на всяка сесия се отчита отделно от p50/p99.
+#
+#   python benchmarks/load_test.py --sessions 1 2 4 8 --steps 20 [--workers 1]
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # ru_maxrss е в KiB под Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def widget(elements, label_prefix):
+    return next(w for w in elements if w.label.startswith(label_prefix))
+
+
+def random_action(at, rng, countries):
+    # Тежестите следват типичното поведение: настройки и после "Планирай"
+    action = rng.choices(
+        ["country", "cities", "transport", "hotel", "days", "plan", "find"],
+        weights=[2, 2, 2, 2, 1, 4, 1],
+    )[0]
+    if action == "country":
+        widget(at.sidebar.selectbox, "🌐").set_value(rng.choice(countries))
+    elif action == "cities":
+        slider = widget(at.sidebar.slider, "🏙️")
+        slider.set_value(rng.randint(slider.min, slider.max))
+    elif action == "transport":
+        widget(at.sidebar.radio, "🚘").set_value(rng.choice(list(TRANSPORTS)))
+    elif action == "hotel":
+        widget(at.sidebar.radio, "🛏️").set_value(rng.choice(list(HOTEL_PRICES)))
+    elif action == "days":
+        widget(at.sidebar.slider, "📆").set_value(rng.randint(2, 21))
+    elif action == "plan":
+        widget(at.sidebar.button, "🧭").click()
+    else:
+        widget(at.sidebar.button, "💡").click()
+    return action
+
+
+def run_worker(seeds, steps, timeout=60):
+    countries = get_catalog().countries
+    rss_start = rss_bytes()
+    sessions = [(random.Random(seed), AppTest.from_file(APP_PATH, default_timeout=timeout)) for seed in seeds]
+
+    initial = []
+    for _, at in sessions:
+        started = time.perf_counter()
+        at.run()
+        initial.append(time.perf_counter() - started)
+
+    latencies = []
+    for _ in range(steps):
+        for rng, at in sessions:
+            action = random_action(at, rng, countries)
+            started = time.perf_counter()
+            at.run()
+            latencies.append((action, time.perf_counter() - started))
+
+    # Сесиите са още живи, така че ръстът включва и тяхното състояние
+    rss_end = rss_bytes()
+    return {
+        "initial": initial,
+        "latencies": latencies,
+        "errors": sum(len(at.exception) for _, at in sessions),
+        "rss_bytes": rss_end,
+        "rss_growth_bytes": rss_end - rss_start,
+    }
+
+
+def run_level(sessions, steps, seed, workers=1):
+    workers = max(1, min(workers, sessions))
+    seeds = [list(range(seed + w, seed + sessions, workers)) for w in range(workers)]
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker, chunk, steps) for chunk in seeds]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - started
+
+    initial = [s for r in results for s in r["initial"]]
+    latencies = [s for r in results for _, s in r["latencies"]]
+    return {
+        "sessions": sessions,
+        "workers": workers,
+        "reruns": len(initial) + len(latencies),
+        "errors": sum(r["errors"] for r in results),
+        "wall_s": wall,
+        "throughput_rps": (len(initial) + len(latencies)) / wall,
+        "initial_p50_s": percentile(initial, 0.5),
+        "initial_max_s": max(initial),
+        "latency_p50_s": percentile(latencies, 0.5),
+        "latency_p99_s": percentile(latencies, 0.99),
+        "rss_per_process_bytes": sum(r["rss_bytes"] for r in results) / workers,
+        "rss_growth_per_session_bytes": sum(r["rss_growth_bytes"] for r in results) / sessions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for app.py")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--steps", type=int, default=20, help="interactions per session")
+    parser.add_argument("--workers", type=int, default=1, help="processes; sessions are split evenly between them")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON output path (default: benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    levels = []
+    for n in args.sessions:
+        level = run_level(n, args.steps, args.seed, args.workers)
+        levels.append(level)
+        print(
+            f"N={n:3d} · {level['throughput_rps']:6.1f} reruns/s · initial p50 {level['initial_p50_s'] * 1000:7.1f} ms · "
+            f"p50 {level['latency_p50_s'] * 1000:7.1f} ms · p99 {level['latency_p99_s'] * 1000:7.1f} ms · "
+            f"{level['rss_per_process_bytes'] / 2**20:6.1f} MiB/process "
+            f"(+{level['rss_growth_per_session_bytes'] / 2**20:.1f} MiB/session) · errors {level['errors']}"
+        )
+
+    last = levels[-1]
+    payload = {
+        "env": environment(),
+        "load": {
+            "steps": args.steps,
+            "workers": args.workers,
+            "levels": levels,
+            "summary": {
+                "sessions": last["sessions"],
+                "throughput_rps": last["throughput_rps"],
+                "initial_p50_s": last["initial_p50_s"],
+                "latency_p50_s": last["latency_p50_s"],
+                "latency_p99_s": last["latency_p99_s"],
+                "rss_per_process_bytes": last["rss_per_process_bytes"],
+                "rss_growth_per_session_bytes": last["rss_growth_per_session_bytes"],
+            },
+        },
+    }
+    print(f"saved {save_results('load', payload, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import sqlite3
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# ================== CATALOG ==================
+#
+# Градовете живеят в SQLite файл (cities.db). Той се чете веднъж на процес
+# и се държи в компактни индекси по име и по държава. Ръчно подбраните
+# държави и градове са в текстовия файл cities.json, от който базата се
+# строи наново:
+#
+#   python catalog.py build [--seed cities.json] [--db cities.db]
+#
+# Внесените от GeoNames градове (importer.py) не са в seed-а и след
+# build се внасят отново.
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.json")
+CATALOG_PATH = os.environ.get("CITY_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.db"))
+
+City = namedtuple("City", ["name", "country", "lat", "lon", "food", "recommendation", "image"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS countries (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    code TEXT,
+    home INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    country TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    food TEXT,
+    recommendation TEXT,
+    image TEXT,
+    geonameid INTEGER,
+    country_code TEXT,
+    population INTEGER,
+    modified TEXT
+);
+CREATE TABLE IF NOT EXISTS imports (
+    source TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS cities_by_country ON cities (country, position);
+CREATE UNIQUE INDEX IF NOT EXISTS cities_by_geonameid ON cities (geonameid);
+CREATE UNIQUE INDEX IF NOT EXISTS countries_by_code ON countries (code);
+"""
+
+# Колони, добавени след първата версия на каталога
+MIGRATIONS = {
+    "countries": [("code", "TEXT"), ("home", "INTEGER NOT NULL DEFAULT 0")],
+    "cities": [("geonameid", "INTEGER"), ("country_code", "TEXT"), ("population", "INTEGER"), ("modified", "TEXT")],
+}
+
+
+def migrate(conn):
+    for table, columns in MIGRATIONS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, kind in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+
+def connect(path=CATALOG_PATH):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    migrate(conn)
+    conn.executescript(INDEXES)
+    return conn
+
+
+def load_seed(seed=SEED_PATH):
+    with open(seed, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def seed_countries(conn, countries):
+    # Имената, ISO кодовете и родната държава (откъдето тръгват пътуванията;
+    # не се предлага като дестинация) идват от seed-а. Липсващите държави се
+    # добавят накрая, а на съществуващите се попълва липсващ код.
+    for country in countries:
+        code, home = country.get("code"), int(country.get("home", False))
+        owner = conn.execute("SELECT name FROM countries WHERE code = ?", (code,)).fetchone() if code else None
+        if owner and owner[0] != country["name"]:
+            # Кодът вече е даден на друга държава (напр. от стар импорт)
+            code = None
+        conn.execute(
+            """
+            INSERT INTO countries (name, position, code, home)
+            VALUES (?, (SELECT COALESCE(MAX(position) + 1, 0) FROM countries), ?, ?)
+            ON CONFLICT (name) DO UPDATE SET code = COALESCE(countries.code, excluded.code), home = excluded.home
+            """,
+            (country["name"], code, home),
+        )
+
+
+def build_catalog(seed=SEED_PATH, path=CATALOG_PATH):
+    data = load_seed(seed)
+
+    # Строи се във временен файл и се подменя наведнъж
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = connect(tmp)
+    try:
+        with conn:
+            seed_countries(conn, data["countries"])
+            positions = {}
+            for city in data["cities"]:
+                position = positions.get(city["country"], 0)
+                positions[city["country"]] = position + 1
+                conn.execute(
+                    "INSERT INTO cities (name, country, position, lat, lon, food, recommendation, image, country_code) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        city["name"],
+                        city["country"],
+                        position,
+                        city["lat"],
+                        city["lon"],
+                        city.get("food"),
+                        city.get("recommendation"),
+                        city.get("image"),
+                        city.get("country_code"),
+                    ),
+                )
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return len(data["countries"]), len(data["cities"])
+
+
+class Catalog:
+    def __init__(self, rows, countries):
+        self.rows = [City(*row) for row in rows]
+        self.names = [city.name for city in self.rows]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.lat = np.array([city.lat for city in self.rows], dtype=float)
+        self.lon = np.array([city.lon for city in self.rows], dtype=float)
+
+        self.by_country = {country: [] for country in countries}
+        for i, city in enumerate(self.rows):
+            if city.country in self.by_country:
+                self.by_country[city.country].append(i)
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH):
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+            # Родната държава не е дестинация; по-старите бази нямат колоната home
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(countries)")}
+            where = "WHERE NOT home " if "home" in columns else ""
+            countries = [name for name, in conn.execute(f"SELECT name FROM countries {where}ORDER BY position")]
+            rows = conn.execute(
+                "SELECT name, country, lat, lon, food, recommendation, image FROM cities ORDER BY country, position"
+            ).fetchall()
+        return cls(rows, countries)
+
+    @property
+    def countries(self):
+        return list(self.by_country)
+
+    def city(self, name):
+        return self.rows[self.index[name]]
+
+    def coords(self, name):
+        i = self.index[name]
+        return float(self.lat[i]), float(self.lon[i])
+
+    def destinations(self, country):
+        return [self.rows[i] for i in self.by_country[country]]
+
+    def city_names(self, country):
+        return [self.names[i] for i in self.by_country[country]]
+
+
+@lru_cache(maxsize=None)
+def get_catalog(path=CATALOG_PATH):
+    return Catalog.load(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the city catalog from its text seed")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--seed", default=SEED_PATH)
+    parser.add_argument("--db", default=CATALOG_PATH)
+    args = parser.parse_args(argv)
+
+    countries, cities = build_catalog(args.seed, args.db)
+    print(f"{countries} countries, {cities} cities -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# ================== DATA ==================
+#
+# Градовете, координатите, снимките и препоръките са в каталога (catalog.py)
+
+HOTEL_PRICES = {
+    "🏠 Бюджетен хотел": 60,
+    "🏨 Комфортен хотел": 100,
+    "🏰 Луксозен хотел": 170,
+}
+
+FOOD_PRICE = 30
+
+START_CITY = "София"
+
+# Предложения за допълнителни спирки в детайлите
+NEARBY_KM = 200
+NEARBY_STOPS = 3
+NEARBY_ROUTE_STOPS = 8
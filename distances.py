@@ -0,0 +1,41 @@
+import numpy as np
+
+# ================== DISTANCES ==================
+#
+# Разстоянията се смятат при поискване и само за нужните индекси (отсечките
+# на маршрута, подматрицата на градовете в него), а не като пълна NxN
+# матрица - с десетки хиляди внесени градове тя не се побира в паметта.
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    # Масиви в радиани с broadcasting; резултатът е в километри
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class DistanceMatrix:
+    def __init__(self, names, lat, lon):
+        # lat/lon са в градуси, в реда на names
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.lat = np.radians(np.asarray(lat, dtype=float))
+        self.lon = np.radians(np.asarray(lon, dtype=float))
+
+    def indices(self, cities):
+        return np.fromiter((self.index[c] for c in cities), dtype=np.intp, count=len(cities))
+
+    def block(self, rows, cols):
+        # Разстояния между два списъка от индекси
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        return haversine(self.lat[rows, None], self.lon[rows, None], self.lat[None, cols], self.lon[None, cols])
+
+    def legs(self, cities):
+        idx = self.indices(cities)
+        a, b = idx[:-1], idx[1:]
+        return haversine(self.lat[a], self.lon[a], self.lat[b], self.lon[b])
+
+    def route_length(self, cities):
+        return float(self.legs(cities).sum())
@@ -0,0 +1,157 @@
+import threading
+from datetime import date
+from functools import lru_cache
+
+from catalog import get_catalog
+from data import FOOD_PRICE, HOTEL_PRICES, START_CITY
+from distances import DistanceMatrix
+from multimodal import LegPlanner
+from plan_cache import PlanCache
+from pricing import PRICES_PATH, PriceTable, build_price_table
+from routing import optimize_route
+from search import PrefixRoutes
+from spatial import SpatialIndex
+from transport import TRANSPORTS
+
+# ================== ENGINE ==================
+
+PLAN_CACHE = PlanCache(maxsize=1024, ttl=3600)
+PRICE_TABLE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_distance_matrix():
+    # Матрицата се смята веднъж на процес, не при всеки rerun
+    catalog = get_catalog()
+    return DistanceMatrix(catalog.names, catalog.lat, catalog.lon)
+
+
+@lru_cache(maxsize=None)
+def get_prefix_routes(optimize=True):
+    catalog = get_catalog()
+    destinations = {country: catalog.city_names(country) for country in catalog.countries}
+    return PrefixRoutes(get_distance_matrix(), destinations, START_CITY, optimize)
+
+
+@lru_cache(maxsize=None)
+def get_spatial_index():
+    catalog = get_catalog()
+    return SpatialIndex(catalog.names, catalog.lat, catalog.lon)
+
+
+@lru_cache(maxsize=None)
+def get_leg_planner():
+    return LegPlanner(get_distance_matrix(), get_transports())
+
+
+@lru_cache(maxsize=None)
+def get_transports():
+    return [cls() for cls in TRANSPORTS.values()]
+
+
+def get_price_table():
+    # Проверява се веднъж на ден; после само mmap
+    return load_price_table(date.today())
+
+
+@lru_cache(maxsize=1)
+def load_price_table(today):
+    # Липсваща или остаряла таблица (минали дати, други градове) се строи
+    # наново от днес; заключването пази от два build-а в един процес
+    with PRICE_TABLE_LOCK:
+        names = get_catalog().names
+        try:
+            table = PriceTable(PRICES_PATH)
+        except (OSError, ValueError, KeyError):
+            table = None
+        if table is None or table.is_stale(today, names):
+            build_price_table(PRICES_PATH, names, today)
+            table = PriceTable(PRICES_PATH)
+        return table
+
+
+class TripPlan:
+    def __init__(self, country, cities, route, transport, hotel_type, days):
+        self.country = country
+        self.cities = cities
+        self.route = route
+        self.transport = transport
+        self.hotel_type = hotel_type
+        self.days = days
+
+        self.hotel_price = HOTEL_PRICES[hotel_type]
+        self.food_price = FOOD_PRICE
+        stops = len(cities) - 1
+        self.total_food = self.food_price * days * stops
+        self.total_hotel = self.hotel_price * days * stops
+
+        # Същият модел като LegPlanner: такса и загубено време за всяка отсечка
+        legs = get_distance_matrix().legs(cities)
+        self.distance = float(legs.sum())
+        self.transport_cost = float(transport.leg_cost(legs).sum())
+        self.travel_hours = float(transport.leg_time(legs).sum())
+        self.total_cost = self.total_food + self.total_hotel + self.transport_cost
+
+    def fits(self, budget):
+        return self.total_cost <= budget
+
+    def to_dict(self):
+        return {
+            "country": self.country,
+            "cities": self.cities,
+            "transport": self.transport.name(),
+            "hotel_type": self.hotel_type,
+            "days": self.days,
+            "distance_km": round(self.distance, 1),
+            "travel_hours": round(self.travel_hours, 2),
+            "transport_cost": round(self.transport_cost, 2),
+            "total_hotel": round(self.total_hotel, 2),
+            "total_food": round(self.total_food, 2),
+            "total_cost": round(self.total_cost, 2),
+            "route_method": self.route.method if self.route else None,
+            "route_solve_ms": round(self.route.solve_ms, 3) if self.route else None,
+        }
+
+
+@lru_cache(maxsize=1024)
+def get_route(country, num_cities, optimize=True):
+    # Редът на градовете не зависи от транспорта, хотела и дните, затова
+    # смяната им не решава маршрута наново; резултатът не бива да се променя
+    cities = [START_CITY] + get_catalog().city_names(country)[:num_cities]
+    if not optimize:
+        return cities, None
+    route = optimize_route(get_distance_matrix(), START_CITY, cities)
+    return route.order, route
+
+
+def plan_trip(country, num_cities, transport_choice, hotel_type, days, optimize=True):
+    catalog = get_catalog()
+    if country not in catalog.by_country:
+        raise ValueError(f"Unknown country: {country}")
+    if transport_choice not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport_choice}")
+    if hotel_type not in HOTEL_PRICES:
+        raise ValueError(f"Unknown hotel type: {hotel_type}")
+    if num_cities < 1:
+        raise ValueError(f"num_cities must be at least 1, got {num_cities}")
+    if days < 1:
+        raise ValueError(f"days must be at least 1, got {days}")
+
+    cities, route = get_route(country, num_cities, optimize)
+    transport = TRANSPORTS[transport_choice]()
+    return TripPlan(country, cities, route, transport, hotel_type, days)
+
+
+def normalize_request(country, num_cities, transport_choice, hotel_type, days, optimize=True):
+    # Бюджетът не влиза в ключа - той само сравнява крайната сума
+    available = len(get_catalog().by_country.get(country, ()))
+    # Горната граница се изравнява с наличните градове; невалидните стойности
+    # остават, за да ги отхвърли plan_trip
+    num_cities = min(int(num_cities), max(available, 1))
+    return (country, num_cities, transport_choice, hotel_type, int(days), bool(optimize))
+
+
+def get_plan(country, num_cities, transport_choice, hotel_type, days, optimize=True):
+    # Споделен между сесиите; върнатият TripPlan не бива да се променя
+    key = normalize_request(country, num_cities, transport_choice, hotel_type, days, optimize)
+    return PLAN_CACHE.get_or_create(key, lambda: plan_trip(*key))
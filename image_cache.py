@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PIL import Image
+
+# ================== IMAGE CACHE ==================
+#
+# Снимките се теглят веднъж, смаляват се до миниатюра и се пазят на диска.
+# Файловете са адресирани по съдържание (sha256 на миниатюрата), а
+# индексът url -> файл е в поддиректория urls/. При надхвърляне на
+# max_bytes се трият най-отдавна използваните миниатюри.
+
+CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".image_cache"))
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+THUMBNAIL_SIZE = (800, 400)
+FETCH_TIMEOUT = 5
+# Неуспешен URL (404, недостъпен хост) не се тегли наново толкова секунди
+RETRY_AFTER = 600
+USER_AGENT = "Mozilla/5.0 (travel-planner image cache)"
+
+
+def make_thumbnail(raw, size=THUMBNAIL_SIZE, quality=80):
+    with Image.open(io.BytesIO(raw)) as img:
+        img = img.convert("RGB")
+        img.thumbnail(size)
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=quality, optimize=True)
+        return out.getvalue()
+
+
+class ImageCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, size=THUMBNAIL_SIZE, timeout=FETCH_TIMEOUT,
+                 retry_after=RETRY_AFTER):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.size = size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.blobs = os.path.join(root, "blobs")
+        self.urls = os.path.join(root, "urls")
+        os.makedirs(self.blobs, exist_ok=True)
+        os.makedirs(self.urls, exist_ok=True)
+
+        self.lock = threading.RLock()
+        self.inflight = {}
+        # url -> момент (time.monotonic), след който може да се опита отново
+        self.failures = {}
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="image-cache")
+
+    def url_key(self, url):
+        return os.path.join(self.urls, hashlib.sha256(url.encode("utf-8")).hexdigest())
+
+    def blob_path(self, digest):
+        return os.path.join(self.blobs, digest + ".jpg")
+
+    def lookup(self, url):
+        try:
+            with open(self.url_key(url), encoding="ascii") as f:
+                path = self.blob_path(f.read().strip())
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime служи за LRU подредба
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def fetch(self, url):
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            raw = response.read()
+        thumb = make_thumbnail(raw, self.size)
+        digest = hashlib.sha256(thumb).hexdigest()
+
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(thumb)
+            os.replace(tmp, path)
+        with open(self.url_key(url), "w", encoding="ascii") as f:
+            f.write(digest)
+
+        self.evict()
+        return thumb
+
+    def load(self, url):
+        data = self.lookup(url)
+        if data is not None:
+            return data
+        try:
+            return self.fetch(url)
+        except Exception:
+            # Бавен или недостъпен хост - приложението показва оригиналния URL
+            with self.lock:
+                self.failures[url] = time.monotonic() + self.retry_after
+            return None
+
+    def submit(self, url):
+        with self.lock:
+            if self.failures.get(url, 0) > time.monotonic():
+                future = Future()
+                future.set_result(None)
+                return future
+            self.failures.pop(url, None)
+            future = self.inflight.get(url)
+            if future is None:
+                future = self.executor.submit(self.load, url)
+                self.inflight[url] = future
+                future.add_done_callback(lambda _, url=url: self.forget(url))
+            return future
+
+    def forget(self, url):
+        with self.lock:
+            self.inflight.pop(url, None)
+
+    def get(self, url, wait=None):
+        data = self.lookup(url)
+        if data is not None:
+            return data
+        future = self.submit(url)
+        try:
+            return future.result(timeout=self.timeout if wait is None else wait)
+        except Exception:
+            return None
+
+    def prefetch(self, urls):
+        return [self.submit(url) for url in urls]
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.blobs):
+                if entry.name.endswith(".jpg"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
@@ -0,0 +1,224 @@
+import argparse
+import gzip
+import io
+import os
+import sys
+import time
+import zipfile
+from itertools import islice
+
+import numpy as np
+
+from catalog import CATALOG_PATH, connect, load_seed, seed_countries
+from spatial import km_to_chord, unit_vectors
+
+# ================== GAZETTEER IMPORT ==================
+#
+# Зарежда GeoNames дъмп (cities500.txt / allCountries.txt, също .zip/.gz)
+# в каталога на планера. Редовете минават през генератори и се записват
+# на партиди, така че паметта не зависи от размера на файла.
+#
+#   python importer.py cities500.zip --countries DE,FR,IT --min-population 50000
+#
+# Повторно пускане е инкрементално: непроменен файл се пропуска изцяло,
+# а ред се презаписва само ако датата му на промяна е по-нова.
+
+BATCH_SIZE = 1000
+MATCH_KM = 15
+# Ръчно въведените градове остават първи; внесените се подреждат по население
+IMPORTED_POSITION = 10**9
+# Под тази позиция са само ръчно въведените градове (населението е далеч под 5*10^8)
+CURATED_POSITIONS = IMPORTED_POSITION // 2
+
+GEONAMES_ID, NAME, ALTERNATE_NAMES, LAT, LON, FEATURE_CLASS, COUNTRY_CODE, POPULATION, MODIFIED = 0, 1, 3, 4, 5, 6, 8, 14, 18
+
+
+def open_dump(path):
+    if path.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+        member = next(n for n in archive.namelist() if n.endswith(".txt") and not n.startswith("readme"))
+        return io.TextIOWrapper(archive.open(member), encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_rows(lines):
+    for line in lines:
+        fields = line.rstrip("\n").split("\t")
+        if len(fields) > MODIFIED:
+            yield fields
+
+
+def select_places(rows, countries, min_population):
+    for fields in rows:
+        if fields[FEATURE_CLASS] != "P":
+            continue
+        if countries and fields[COUNTRY_CODE] not in countries:
+            continue
+        population = int(fields[POPULATION] or 0)
+        if population < min_population:
+            continue
+        yield {
+            "geonameid": int(fields[GEONAMES_ID]),
+            "name": fields[NAME],
+            "alternate_names": fields[ALTERNATE_NAMES],
+            "lat": float(fields[LAT]),
+            "lon": float(fields[LON]),
+            "country_code": fields[COUNTRY_CODE],
+            "population": population,
+            "modified": fields[MODIFIED],
+        }
+
+
+def batches(items, size=BATCH_SIZE):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def flag(code):
+    return "".join(chr(0x1F1E6 + ord(c) - ord("A")) for c in code.upper())
+
+
+def fingerprint(path, countries, min_population):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{int(stat.st_mtime)}:{','.join(sorted(countries))}:{min_population}"
+
+
+class Importer:
+    def __init__(self, conn):
+        self.conn = conn
+        self.countries = dict(conn.execute("SELECT code, name FROM countries WHERE code IS NOT NULL"))
+
+        # Ръчно въведени градове без geonameid; свързват се по име (сред
+        # алтернативните имена в GeoNames) и близост
+        self.curated = {
+            name: (city_id, unit_vectors(lat, lon))
+            for city_id, name, lat, lon in conn.execute("SELECT id, name, lat, lon FROM cities WHERE geonameid IS NULL")
+        }
+        self.match_chord = km_to_chord(MATCH_KM)
+        self.written = 0
+
+    def country_for(self, code):
+        # Всички държави от seed-а вече имат код; непознатите получават флаг и ISO код
+        if code not in self.countries:
+            name = f"{flag(code)} {code}"
+            position = self.conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM countries").fetchone()[0]
+            self.conn.execute("INSERT INTO countries (name, position, code) VALUES (?, ?, ?)", (name, position, code))
+            self.countries[code] = name
+        return self.countries[code]
+
+    def curated_match(self, place):
+        if not self.curated:
+            return None
+        names = {place["name"], *place["alternate_names"].split(",")}
+        point = unit_vectors(place["lat"], place["lon"])
+        for name in names & self.curated.keys():
+            city_id, xyz = self.curated[name]
+            if np.linalg.norm(xyz - point) <= self.match_chord:
+                del self.curated[name]
+                return city_id
+        return None
+
+    def unique_name(self, place):
+        for name in (place["name"], f"{place['name']} ({place['country_code']})", f"{place['name']} ({place['geonameid']})"):
+            owner = self.conn.execute("SELECT geonameid FROM cities WHERE name = ?", (name,)).fetchone()
+            if owner is None or owner[0] == place["geonameid"]:
+                return name
+        raise ValueError(f"cannot find a free name for geonameid {place['geonameid']}")
+
+    def write_batch(self, batch):
+        before = self.conn.total_changes
+        with self.conn:
+            for place in batch:
+                known = self.conn.execute("SELECT 1 FROM cities WHERE geonameid = ?", (place["geonameid"],)).fetchone()
+                city_id = None if known else self.curated_match(place)
+                if city_id is not None:
+                    # Запазва българското име и описанията, добавя данните от GeoNames
+                    self.conn.execute(
+                        "UPDATE cities SET geonameid = ?, country_code = ?, population = ?, modified = ? WHERE id = ?",
+                        (place["geonameid"], place["country_code"], place["population"], place["modified"], city_id),
+                    )
+                    continue
+                self.conn.execute(
+                    """
+                    INSERT INTO cities (name, country, position, lat, lon, geonameid, country_code, population, modified)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (geonameid) DO UPDATE SET
+                        lat = CASE WHEN cities.position < ? THEN cities.lat ELSE excluded.lat END,
+                        lon = CASE WHEN cities.position < ? THEN cities.lon ELSE excluded.lon END,
+                        population = excluded.population,
+                        position = CASE WHEN cities.position < ? THEN cities.position ELSE excluded.position END,
+                        modified = excluded.modified
+                    WHERE excluded.modified > cities.modified
+                    """,
+                    (
+                        self.unique_name(place),
+                        self.country_for(place["country_code"]),
+                        IMPORTED_POSITION - place["population"],
+                        place["lat"],
+                        place["lon"],
+                        place["geonameid"],
+                        place["country_code"],
+                        place["population"],
+                        place["modified"],
+                        CURATED_POSITIONS,
+                        CURATED_POSITIONS,
+                        CURATED_POSITIONS,
+                    ),
+                )
+        self.written += self.conn.total_changes - before
+
+
+def run_import(path, db=CATALOG_PATH, countries=(), min_population=50_000, force=False, batch_size=BATCH_SIZE):
+    countries = {c.strip().upper() for c in countries if c.strip()}
+    conn = connect(db)
+    try:
+        source = os.path.abspath(path)
+        current = fingerprint(path, countries, min_population)
+        seen = conn.execute("SELECT fingerprint FROM imports WHERE source = ?", (source,)).fetchone()
+        if seen and seen[0] == current and not force:
+            return {"skipped": True, "places": 0, "written": 0}
+
+        with conn:
+            seed_countries(conn, load_seed()["countries"])
+        importer = Importer(conn)
+        places = 0
+        with open_dump(path) as lines:
+            for batch in batches(select_places(read_rows(lines), countries, min_population), batch_size):
+                importer.write_batch(batch)
+                places += len(batch)
+
+        with conn:
+            conn.execute(
+                "INSERT INTO imports (source, fingerprint) VALUES (?, ?) "
+                "ON CONFLICT (source) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (source, current),
+            )
+        return {"skipped": False, "places": places, "written": importer.written}
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a GeoNames dump into the city catalog")
+    parser.add_argument("dump", help="GeoNames tab-separated file (.txt, .zip or .gz)")
+    parser.add_argument("--db", default=CATALOG_PATH)
+    parser.add_argument("--countries", default="", help="comma-separated ISO codes, e.g. DE,FR (default: all)")
+    parser.add_argument("--min-population", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--force", action="store_true", help="re-read the dump even if it has not changed")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = run_import(args.dump, args.db, args.countries.split(","), args.min_population, args.force, args.batch_size)
+    elapsed = time.perf_counter() - started
+    if result["skipped"]:
+        print("dump unchanged since the last import, nothing to do", file=sys.stderr)
+    else:
+        print(f"{result['places']} places matched, {result['written']} rows written in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from catalog import get_catalog
+from plan_cache import PlanCache
+
+# ================== MAP ==================
+#
+# JSON спецификацията за deck.gl се сглобява директно, без pdk.Deck и без
+# pandas: координатите се вземат от масивите на каталога и всеки ред е
+# само [lon, lat] (аксесор "@@=-" връща самия ред). Слоят с всички градове
+# от каталога не се променя, затова се сериализира веднъж на процес и се
+# вмъква готов във всяка карта. st.pydeck_chart вика само to_json().
+
+DECK_CACHE = PlanCache(maxsize=512, ttl=3600)
+
+# 5 знака след запетаята ~ 1 м
+PRECISION = 5
+MAP_STYLE = "https://basemaps.cartocdn.com/gl/dark-matter-gl-style/style.json"
+
+
+class DeckSpec:
+    # Готов JSON за st.pydeck_chart
+    def __init__(self, spec):
+        self.spec = spec
+
+    def to_json(self):
+        return self.spec
+
+
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def positions(lon, lat):
+    return np.round(np.column_stack([lon, lat]), PRECISION).tolist()
+
+
+def scatter_layer(layer_id, coords, **style):
+    return dumps({"@@type": "ScatterplotLayer", "id": layer_id, "data": coords, "getPosition": "@@=-", **style})
+
+
+def path_layer(layer_id, coords, **style):
+    return dumps({"@@type": "PathLayer", "id": layer_id, "data": [coords], "getPath": "@@=-", **style})
+
+
+def deck_json(layers, lat, lon, zoom=4):
+    # layers са вече сериализирани слоеве; тук се добавя само обвивката
+    view = {
+        "initialViewState": {"latitude": float(np.mean(lat)), "longitude": float(np.mean(lon)), "zoom": zoom},
+        "mapProvider": "carto",
+        "mapStyle": MAP_STYLE,
+        "views": [{"@@type": "MapView", "controller": True}],
+    }
+    return '{"layers":[' + ",".join(layers) + "]," + dumps(view)[1:]
+
+
+@lru_cache(maxsize=None)
+def get_base_layer():
+    catalog = get_catalog()
+    return scatter_layer(
+        "catalog",
+        positions(catalog.lon, catalog.lat),
+        getRadius=600,
+        radiusMinPixels=2,
+        radiusMaxPixels=4,
+        getFillColor=[160, 160, 160, 120],
+    )
+
+
+def build_deck(cities):
+    catalog = get_catalog()
+    idx = [catalog.index[c] for c in cities]
+    lat, lon = catalog.lat[idx], catalog.lon[idx]
+    coords = positions(lon, lat)
+
+    layers = [
+        get_base_layer(),
+        path_layer("route", coords, getColor=[215, 38, 61], getWidth=4, widthUnits="pixels"),
+        scatter_layer(
+            "stops",
+            coords,
+            getRadius=900,
+            radiusMinPixels=4,
+            radiusMaxPixels=10,
+            getFillColor=[50, 130, 200],
+            pickable=True,
+        ),
+    ]
+    return DeckSpec(deck_json(layers, lat, lon))
+
+
+def get_deck(cities):
+    # Картата зависи само от реда на градовете
+    return DECK_CACHE.get_or_create(tuple(cities), lambda: build_deck(cities))
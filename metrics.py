@@ -0,0 +1,142 @@
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# ================== METRICS ==================
+#
+# Времена по секции на app.py за всеки rerun. Пазят се последните WINDOW
+# измервания за p50/p95/p99 и общ брой/сума от старта на процеса.
+# Износ в Prometheus текстов формат - във файл (PLANNER_METRICS_FILE)
+# или по HTTP (PLANNER_METRICS_PORT).
+
+WINDOW = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+METRICS_FILE = os.environ.get("PLANNER_METRICS_FILE")
+METRICS_PORT = os.environ.get("PLANNER_METRICS_PORT")
+
+
+class Stopwatch:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, section):
+        # Записва времето от предишния lap до сега
+        now = time.perf_counter()
+        self.metrics.observe(section, now - self.last)
+        self.last = now
+
+    def finish(self, section="rerun"):
+        self.metrics.observe(section, time.perf_counter() - self.started)
+
+
+class Metrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counts = {}
+        self.sums = {}
+
+    def observe(self, section, seconds):
+        with self.lock:
+            if section not in self.samples:
+                self.samples[section] = deque(maxlen=self.window)
+                self.counts[section] = 0
+                self.sums[section] = 0.0
+            self.samples[section].append(seconds)
+            self.counts[section] += 1
+            self.sums[section] += seconds
+
+    def stopwatch(self):
+        return Stopwatch(self)
+
+    def summary(self):
+        with self.lock:
+            snapshot = {name: (list(values), self.counts[name], self.sums[name]) for name, values in self.samples.items()}
+        result = {}
+        for name, (values, count, total) in snapshot.items():
+            quantiles = np.quantile(values, QUANTILES)
+            result[name] = {
+                "count": count,
+                "sum": total,
+                **{f"p{round(q * 100)}": float(v) for q, v in zip(QUANTILES, quantiles)},
+            }
+        return result
+
+    def to_prometheus(self, caches=None):
+        lines = [
+            "# HELP planner_section_seconds Wall time per app.py section and rerun",
+            "# TYPE planner_section_seconds summary",
+        ]
+        for name, stats in sorted(self.summary().items()):
+            for q in QUANTILES:
+                lines.append(f'planner_section_seconds{{section="{name}",quantile="{q}"}} {stats[f"p{round(q * 100)}"]:.6f}')
+            lines.append(f'planner_section_seconds_sum{{section="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'planner_section_seconds_count{{section="{name}"}} {stats["count"]}')
+
+        if caches:
+            for counter in ("hits", "misses", "evictions", "expirations"):
+                lines.append(f"# TYPE planner_cache_{counter}_total counter")
+                for label, cache in caches.items():
+                    lines.append(f'planner_cache_{counter}_total{{cache="{label}"}} {cache.stats()[counter]}')
+            lines.append("# TYPE planner_cache_size gauge")
+            for label, cache in caches.items():
+                lines.append(f'planner_cache_size{{cache="{label}"}} {cache.stats()["size"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, caches=None):
+        # Сесиите на Streamlit са нишки в един процес - всеки запис ползва
+        # свой временен файл. Грешка при износа не бива да чупи rerun-а.
+        tmp = None
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp", delete=False
+            ) as f:
+                tmp = f.name
+                f.write(self.to_prometheus(caches))
+            os.replace(tmp, path)
+        except OSError:
+            if tmp is not None:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            return False
+        return True
+
+    def serve(self, port, caches=None, host="127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus(caches).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, int(port)), Handler)
+        except OSError:
+            # Портът е зает (напр. от друг worker със същата среда) - без HTTP
+            # експорт, но страницата трябва да работи
+            return None
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+METRICS = Metrics()
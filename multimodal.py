@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+import numpy as np
+
+# ================== MULTIMODAL ==================
+#
+# Най-изгодният вид транспорт за всяка отсечка от маршрута поотделно.
+# Теглото е цена + time_value * часове, т.е. фиксирана част плюс част на
+# км; такава цена е субадитивна, така че прекачване през трети град
+# никога не е по-изгодно от прякото пътуване и търсене на път в граф не
+# е нужно - всички отсечки се решават наведнъж с argmin.
+
+Segment = namedtuple("Segment", ["start", "end", "mode", "km", "cost", "hours"])
+
+
+class LegPlanner:
+    def __init__(self, matrix, transports):
+        self.matrix = matrix
+        self.transports = transports
+
+        self.price_per_km = np.array([t.price_per_km for t in transports], dtype=float)
+        self.hours_per_km = np.array([1 / t.speed for t in transports], dtype=float)
+        self.fixed_cost = np.array([t.fixed_cost for t in transports], dtype=float)
+        self.overhead_hours = np.array([t.overhead_hours for t in transports], dtype=float)
+
+    def edge_weights(self, distances, time_value):
+        # Редове: отсечки, колони: видове транспорт
+        per_km = self.price_per_km + time_value * self.hours_per_km
+        fixed = self.fixed_cost + time_value * self.overhead_hours
+        return fixed[None, :] + distances[:, None] * per_km[None, :]
+
+    def plan_legs(self, cities, time_value):
+        if len(cities) < 2:
+            return []
+        distances = self.matrix.legs(cities)
+        modes = self.edge_weights(distances, time_value).argmin(axis=1)
+
+        segments = []
+        for a, b, km, mode in zip(cities, cities[1:], distances.tolist(), modes.tolist()):
+            transport = self.transports[mode]
+            segments.append(Segment(a, b, transport.name(), km, transport.leg_cost(km), transport.leg_time(km)))
+        return segments
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+
+# ================== PLAN CACHE ==================
+#
+# Общ кеш за всички сесии в процеса: LRU с ограничен размер и TTL.
+# Една и съща стойност се пресмята веднъж, дори при паралелни заявки.
+
+MISSING = object()
+
+
+class PlanCache:
+    def __init__(self, maxsize=1024, ttl=3600, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self._lookup(key)
+        return None if value is MISSING else value
+
+    def _lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires, value = entry
+        if expires <= self.clock():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (self.clock() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        with self.lock:
+            value = self._lookup(key)
+            if value is not MISSING:
+                return value
+            key_lock = self.pending.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Друга сесия може вече да е пресметнала стойността: това е
+            # попадение, а не втори пропуск за същия ключ
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] > self.clock():
+                    self.entries.move_to_end(key)
+                    self.misses -= 1
+                    self.hits += 1
+                    return entry[1]
+            try:
+                value = factory()
+                self.put(key, value)
+            finally:
+                with self.lock:
+                    self.pending.pop(key, None)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
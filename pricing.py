@@ -0,0 +1,183 @@
+import argparse
+import glob
+import json
+import os
+import tempfile
+import zlib
+from datetime import date
+
+import numpy as np
+
+from data import FOOD_PRICE
+
+# ================== DATE-AWARE PRICING ==================
+#
+# Цени по град и по нощ в компактен бинарен файл (prices-<начало>.npy,
+# float32, форма 2 x градове x дни: множител за хотела и цена на храната)
+# плюс prices.json с началната дата, реда на градовете и името на файла с
+# данните. Файлът се отваря с mmap, така че всички сесии и процеси делят
+# едни и същи страници. Календарът започва от днес и се превърта напред,
+# щом остарее.
+#
+#   python pricing.py build --start 2027-01-01 --days 365
+
+PRICES_PATH = os.environ.get("PRICE_TABLE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prices.npy"))
+HOTEL, FOOD = 0, 1
+FESTIVAL_DAYS = 3
+FESTIVALS_PER_YEAR = 3
+
+
+def meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def data_path(path, start):
+    base, ext = os.path.splitext(path)
+    return f"{base}-{start.isoformat()}{ext}"
+
+
+def uniform_noise(keys):
+    # splitmix64: едно и също (град, дата) дава едно и също число при всеки
+    # build, така че превъртането на календара не променя вече видени цени
+    x = keys.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over="ignore"):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(float) / 2.0**53
+
+
+def normal_noise(keys):
+    u1 = 1.0 - uniform_noise(keys * 2)
+    u2 = uniform_noise(keys * 2 + 1)
+    return np.sqrt(-2 * np.log(u1)) * np.cos(2 * np.pi * u2)
+
+
+def noise_keys(cities, ordinals, channel, seed):
+    return ((cities[:, None] * 1_000_003 + ordinals[None, :]) * 8 + channel) * 1_000_003 + seed
+
+
+def price_model(names, start, days, seed=0):
+    # Синтетичен сезонен модел: пик през юли, по-скъпи петък и събота,
+    # случайни фестивали и собствено ниво за всеки град
+    cities = np.array([zlib.crc32(name.encode("utf-8")) for name in names], dtype=np.uint64)
+    first = start.toordinal()
+    ordinals = np.arange(first, first + days, dtype=np.uint64)
+    dates = np.datetime64(start, "D") + np.arange(days)
+
+    day_of_year = (dates - dates.astype("datetime64[Y]")).astype(int) + 1
+    weekday = (dates.astype(int) + 3) % 7
+    weekend = (weekday == 4) | (weekday == 5)
+    season = np.cos(2 * np.pi * (day_of_year - 196) / 365.25)
+
+    level = 1.0 + 0.08 * normal_noise(noise_keys(cities, np.zeros(1, dtype=np.uint64), 0, seed))
+    hotel = level * (1 + 0.3 * season + 0.12 * weekend) + 0.03 * normal_noise(noise_keys(cities, ordinals, 1, seed))
+
+    # Фестивалът започва в случаен ден и трае FESTIVAL_DAYS нощи
+    lead = np.arange(first - FESTIVAL_DAYS + 1, first + days, dtype=np.uint64)
+    starts = uniform_noise(noise_keys(cities, lead, 2, seed)) < FESTIVALS_PER_YEAR / 365
+    festival = np.zeros((len(names), days), dtype=bool)
+    for shift in range(FESTIVAL_DAYS):
+        festival |= starts[:, shift:shift + days]
+    hotel = hotel * np.where(festival, 1.5, 1.0)
+
+    food = FOOD_PRICE * (level * (1 + 0.08 * season) + 0.02 * normal_noise(noise_keys(cities, ordinals, 3, seed)))
+    return np.stack([hotel, food]).astype(np.float32)
+
+
+def build_price_table(path, names, start, days=365, seed=0):
+    # Данните отиват в prices-<начало>.npy, после prices.json се подменя
+    # наведнъж и сочи към тях. Временните файлове са уникални, така че
+    # паралелни build-ове не си пречат, а читател никога не вижда json от
+    # една таблица с данни от друга.
+    directory = os.path.dirname(os.path.abspath(path))
+    target = data_path(path, start)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npy.tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, price_model(names, start, days, seed))
+    os.replace(tmp, target)
+
+    meta = {"start": start.isoformat(), "cities": list(names), "data": os.path.basename(target)}
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".json.tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, meta_path(path))
+
+    # Таблици с по-ранно начало вече не се ползват; отворените mmap-ове остават валидни
+    base, ext = os.path.splitext(path)
+    for old in glob.glob(f"{glob.escape(base)}-*{ext}"):
+        if os.path.basename(old) < os.path.basename(target):
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+class PriceTable:
+    def __init__(self, path=PRICES_PATH):
+        with open(meta_path(path), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.start = date.fromisoformat(meta["start"])
+        self.names = meta["cities"]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.table = np.load(os.path.join(os.path.dirname(os.path.abspath(path)), meta["data"]), mmap_mode="r")
+        self.days = self.table.shape[2]
+
+    def is_stale(self, today, names):
+        return self.start < today or self.names != list(names)
+
+    def nightly(self, cities, hotel_price):
+        # Цена за нощувка и храна, ред за всеки град; липсващите градове са по базова цена
+        rows = np.empty((len(cities), self.days))
+        for k, city in enumerate(cities):
+            i = self.index.get(city)
+            if i is None:
+                rows[k] = hotel_price + FOOD_PRICE
+            else:
+                rows[k] = hotel_price * self.table[HOTEL, i] + self.table[FOOD, i]
+        return rows
+
+    def start_date_costs(self, cities, hotel_price, days, earliest=None):
+        # Град k се посещава в нощите [s + k*days, s + (k+1)*days) за всяко
+        # начало s от earliest (по подразбиране днес) нататък
+        earliest = date.today() if earliest is None else earliest
+        nightly = self.nightly(cities, hotel_price)
+        prefix = np.zeros((len(cities), self.days + 1))
+        np.cumsum(nightly, axis=1, out=prefix[:, 1:])
+
+        span = len(cities) * days
+        first = max(0, (earliest - self.start).days)
+        starts = np.arange(first, self.days - span + 1)
+        totals = np.zeros(len(starts))
+        for k in range(len(cities)):
+            totals += prefix[k, starts + (k + 1) * days] - prefix[k, starts + k * days]
+        dates = np.datetime64(self.start, "D") + starts
+        return dates, totals
+
+    def cheapest_start(self, cities, hotel_price, days, earliest=None):
+        dates, totals = self.start_date_costs(cities, hotel_price, days, earliest)
+        if not len(totals):
+            return None
+        best = int(totals.argmin())
+        return dates[best].astype(date), float(totals[best])
+
+
+def main(argv=None):
+    from catalog import get_catalog
+
+    parser = argparse.ArgumentParser(description="Build the per-city, per-night price table")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--start", default=date.today().isoformat())
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default=PRICES_PATH)
+    args = parser.parse_args(argv)
+
+    names = get_catalog().names
+    build_price_table(args.output, names, date.fromisoformat(args.start), args.days, args.seed)
+    print(f"{len(names)} cities x {args.days} nights -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# ================== ROUTE OPTIMIZER ==================
+
+EXACT_LIMIT = 15
+TIME_BUDGET = 0.2
+
+RouteResult = namedtuple("RouteResult", ["order", "length_km", "solve_ms", "method"])
+
+
+def path_length(d, route):
+    route = np.asarray(route)
+    return float(d[route[:-1], route[1:]].sum())
+
+
+def solve_exact(d):
+    # Held-Karp с bitmask: път от връх 0 през всички останали, без връщане
+    n = len(d) - 1
+    if n <= 1:
+        return list(range(n + 1))
+
+    full = 1 << n
+    dp = np.full((full, n), np.inf)
+    parent = np.full((full, n), -1, dtype=np.int64)
+    for j in range(n):
+        dp[1 << j, j] = d[0, j + 1]
+
+    masks = np.arange(full)
+    popcount = np.zeros(full, dtype=np.int64)
+    for j in range(n):
+        popcount += (masks >> j) & 1
+
+    sub = d[1:, 1:]
+    for size in range(1, n):
+        layer = masks[popcount == size]
+        costs = dp[layer]
+        for k in range(n):
+            free = (layer >> k) & 1 == 0
+            if not free.any():
+                continue
+            src = layer[free]
+            cand = costs[free] + sub[:, k]
+            best = cand.argmin(axis=1)
+            dp[src | (1 << k), k] = cand[np.arange(len(src)), best]
+            parent[src | (1 << k), k] = best
+
+    mask = full - 1
+    last = int(dp[mask].argmin())
+    order = []
+    while last >= 0:
+        order.append(last + 1)
+        prev = int(parent[mask, last])
+        mask ^= 1 << last
+        last = prev
+    return [0] + order[::-1]
+
+
+def nearest_neighbour(d):
+    n = len(d)
+    route = [0]
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, d[route[-1]])
+        nxt = int(row.argmin())
+        route.append(nxt)
+        visited[nxt] = True
+    return route
+
+
+def two_opt_pass(d, route):
+    # Обръща сегмент route[i:j+1]; стартът (позиция 0) остава фиксиран
+    r = np.asarray(route)
+    n = len(r)
+    improved = False
+    for i in range(1, n - 1):
+        a, b = r[i - 1], r[i]
+        js = np.arange(i + 1, n)
+        c = r[js]
+        nxt = np.append(r[i + 2:], -1)
+        has_next = nxt >= 0
+        before = d[a, b] + np.where(has_next, d[c, np.where(has_next, nxt, 0)], 0.0)
+        after = d[a, c] + np.where(has_next, d[b, np.where(has_next, nxt, 0)], 0.0)
+        delta = after - before
+        k = int(delta.argmin())
+        if delta[k] < -1e-9:
+            j = js[k]
+            r[i:j + 1] = r[i:j + 1][::-1].copy()
+            improved = True
+    return r.tolist(), improved
+
+
+def or_opt_pass(d, route, deadline, max_segment=3):
+    # Премества сегмент от 1..3 града на по-изгодно място в маршрута
+    improved = False
+    for seg_len in range(1, max_segment + 1):
+        i = 1
+        while i + seg_len <= len(route) and time.perf_counter() < deadline:
+            segment = route[i:i + seg_len]
+            rest = route[:i] + route[i + seg_len:]
+            p, first, last = route[i - 1], segment[0], segment[-1]
+            removed = d[p, first]
+            if i + seg_len < len(route):
+                q = route[i + seg_len]
+                removed += d[last, q] - d[p, q]
+
+            # Вмъкване между rest[pos-1] и rest[pos] за всички pos наведнъж
+            r = np.asarray(rest)
+            x = r
+            y = np.append(r[1:], -1)
+            has_next = y >= 0
+            y_safe = np.where(has_next, y, 0)
+            base = np.where(has_next, d[x, y_safe], 0.0)
+            forward = d[x, first] + np.where(has_next, d[last, y_safe], 0.0) - base
+            backward = d[x, last] + np.where(has_next, d[first, y_safe], 0.0) - base
+            forward[i - 1] = backward[i - 1] = np.inf
+
+            k_fwd, k_bwd = int(forward.argmin()), int(backward.argmin())
+            if min(forward[k_fwd], backward[k_bwd]) < removed - 1e-9:
+                if forward[k_fwd] <= backward[k_bwd]:
+                    pos, seg = k_fwd + 1, segment
+                else:
+                    pos, seg = k_bwd + 1, segment[::-1]
+                route = rest[:pos] + seg + rest[pos:]
+                improved = True
+            i += 1
+    return route, improved
+
+
+def solve_heuristic(d, time_budget=TIME_BUDGET):
+    deadline = time.perf_counter() + time_budget
+    route = nearest_neighbour(d)
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        route, improved = two_opt_pass(d, route)
+        if time.perf_counter() >= deadline:
+            break
+        route, moved = or_opt_pass(d, route, deadline)
+        improved = improved or moved
+    return route
+
+
+def optimize_route(matrix, start, cities, exact_limit=EXACT_LIMIT, time_budget=TIME_BUDGET):
+    started = time.perf_counter()
+    nodes = [start] + [c for c in cities if c != start]
+    idx = matrix.indices(nodes)
+    d = matrix.block(idx, idx)
+
+    if len(nodes) - 1 <= exact_limit:
+        route, method = solve_exact(d), "exact"
+    else:
+        route, method = solve_heuristic(d, time_budget), "heuristic"
+
+    solve_ms = (time.perf_counter() - started) * 1000
+    return RouteResult([nodes[i] for i in route], path_length(d, route), solve_ms, method)
@@ -0,0 +1,112 @@
+import threading
+
+import numpy as np
+
+from routing import EXACT_LIMIT, path_length, solve_exact
+
+# Същата граница като get_route, така че до нея дължините в търсенето
+# съвпадат с маршрута, който потребителят получава за същия ред
+EXACT_PREFIX = EXACT_LIMIT
+
+# ================== BUDGET SEARCH ==================
+
+
+class PrefixRoutes:
+    # Маршрут и дължина за първите n града на всяка държава. Растат
+    # постепенно: n-тият град се вмъква на най-евтиното място в маршрута за
+    # n-1 града (до EXACT_PREFIX града се решава точно), а държава спира да
+    # расте, щом долната граница на цената ѝ надхвърли бюджета. Споделя се
+    # между сесиите, затова разширяването е под заключване.
+
+    def __init__(self, matrix, destinations, start, optimize=True):
+        self.matrix = matrix
+        self.destinations = {country: [matrix.index[n] for n in names] for country, names in destinations.items()}
+        self.start = matrix.index[start]
+        self.optimize = optimize
+        self.routes = {country: [self.start] for country in self.destinations}
+        self.lengths = {country: [] for country in self.destinations}
+        self.lock = threading.Lock()
+
+    def grow(self, country):
+        # Добавя следващия град на държавата и връща новата дължина
+        route = self.routes[country]
+        city = self.destinations[country][len(self.lengths[country])]
+        if not self.optimize:
+            route.append(city)
+            length = (self.lengths[country][-1] if self.lengths[country] else 0.0) + float(self.matrix.block([route[-2]], [city])[0, 0])
+        elif len(route) <= EXACT_PREFIX:
+            nodes = route + [city]
+            d = self.matrix.block(nodes, nodes)
+            order = solve_exact(d)
+            route[:] = [nodes[i] for i in order]
+            length = path_length(d, order)
+        else:
+            d = self.matrix.block([city], route)[0]
+            legs = self.matrix.block(route[:-1], route[1:]).diagonal()
+            between = d[:-1] + d[1:] - legs
+            k = int(between.argmin())
+            if between[k] < d[-1]:
+                route.insert(k + 1, city)
+                length = self.lengths[country][-1] + float(between[k])
+            else:
+                route.append(city)
+                length = self.lengths[country][-1] + float(d[-1])
+        self.lengths[country].append(length)
+        return length
+
+    def within(self, budget, per_city, per_km):
+        # Редове (държава, брой градове, км), чиято долна граница
+        # count * per_city + km * per_km не надхвърля бюджета. Дължината
+        # не намалява с броя градове, така че след първото превишаване
+        # по-дългите варианти се пропускат.
+        countries, counts, distances = [], [], []
+        with self.lock:
+            for country, cities in self.destinations.items():
+                lengths = self.lengths[country]
+                for count in range(1, len(cities) + 1):
+                    km = lengths[count - 1] if count <= len(lengths) else self.grow(country)
+                    if count * per_city + km * per_km > budget:
+                        break
+                    countries.append(country)
+                    counts.append(count)
+                    distances.append(km)
+        return np.array(countries, dtype=object), np.array(counts, dtype=int), np.array(distances, dtype=float)
+
+
+def search_trips(routes, transports, hotel_prices, food_price, budget, min_days=2, max_days=21, limit=20):
+    import pandas as pd
+
+    price_per_km = np.array([t.price_per_km for t in transports], dtype=float)
+    fixed_cost = np.array([t.fixed_cost for t in transports], dtype=float)
+    nightly = np.array(list(hotel_prices.values()), dtype=float) + food_price
+    countries, counts, distances = routes.within(budget, nightly.min() * min_days + fixed_cost.min(), price_per_km.min())
+
+    # Оси: маршрут x транспорт x хотел; маршрут с count града има count отсечки
+    shape = (len(distances), len(price_per_km), len(nightly))
+    leg_fees = counts[:, None] * fixed_cost[None, :]
+    transport_cost = np.broadcast_to((leg_fees + distances[:, None] * price_per_km[None, :])[:, :, None], shape)
+    per_day = np.broadcast_to(counts[:, None, None] * nightly[None, None, :], shape)
+
+    # Цената расте линейно с дните, затова най-дългият възможен престой
+    # се смята директно, а не чрез обхождане на всеки ден
+    affordable = np.floor((budget - transport_cost) / per_day)
+    best_days = np.minimum(affordable, max_days)
+    feasible = best_days >= min_days
+    if not feasible.any():
+        return pd.DataFrame(columns=["Държава", "Градове", "Транспорт", "Хотел", "Дни", "Обща сума"])
+
+    r, t, h = np.nonzero(feasible)
+    days = best_days[r, t, h].astype(int)
+    total = transport_cost[r, t, h] + per_day[r, t, h] * days
+
+    order = np.lexsort((total, -days, -counts[r]))[:limit]
+    hotel_names = np.array(list(hotel_prices), dtype=object)
+    transport_names = np.array([tr.name() for tr in transports], dtype=object)
+    return pd.DataFrame({
+        "Държава": countries[r][order],
+        "Градове": counts[r][order],
+        "Транспорт": transport_names[t][order],
+        "Хотел": hotel_names[h][order],
+        "Дни": days[order],
+        "Обща сума": total[order].round(2),
+    })
@@ -0,0 +1,89 @@
+import numpy as np
+
+# ================== BUDGET RISK ==================
+#
+# Монте Карло върху цените: фестивали (по-скъп хотел в даден град),
+# дъждовни дни (допълнителни разходи за храна и музеи), отстъпки за
+# транспорт и общ шум в цените. Сценариите се генерират на парчета, а
+# квантилите се смятат от хистограма с фиксирани кошчета, така че
+# паметта не зависи от броя сценарии.
+
+FESTIVAL_PROBABILITY = 0.15
+FESTIVAL_SURCHARGE = 0.4
+RAIN_PROBABILITY = 0.2
+RAIN_EXTRA = 15
+DISCOUNT_PROBABILITY = 0.1
+DISCOUNT = 0.15
+PRICE_NOISE = 0.08
+
+CHUNK_SIZE = 100_000
+BINS = 4096
+QUANTILES = (0.05, 0.5, 0.95, 0.99)
+
+
+def histogram_quantiles(counts, edges, quantiles):
+    cumulative = np.cumsum(counts)
+    total = cumulative[-1]
+    result = {}
+    for q in quantiles:
+        target = q * total
+        i = int(np.searchsorted(cumulative, target))
+        i = min(i, len(counts) - 1)
+        before = cumulative[i - 1] if i > 0 else 0
+        inside = counts[i]
+        fraction = (target - before) / inside if inside else 0.0
+        result[q] = float(edges[i] + fraction * (edges[i + 1] - edges[i]))
+    return result
+
+
+def simulate_budget(hotel_price, food_price, stops, days, transport_cost, budget,
+                    scenarios=100_000, seed=0, chunk_size=CHUNK_SIZE):
+    rng = np.random.default_rng(seed)
+    stay_nights = stops * days
+    base = hotel_price * stay_nights + food_price * stay_nights + transport_cost
+
+    # Горна граница с голям запас; всичко над нея попада в последното кошче
+    upper = max(base, 1.0) * 3
+    edges = np.linspace(0.0, upper, BINS + 1)
+    counts = np.zeros(BINS, dtype=np.int64)
+
+    within = 0
+    total_sum = 0.0
+    festivals = 0
+    rain_days = 0
+    discounts = 0
+
+    done = 0
+    while done < scenarios:
+        m = min(chunk_size, scenarios - done)
+
+        festival = rng.random((m, stops)) < FESTIVAL_PROBABILITY
+        hotel_factor = (1 + FESTIVAL_SURCHARGE * festival).sum(axis=1)
+        hotel = hotel_price * days * hotel_factor * rng.lognormal(0.0, PRICE_NOISE, m)
+
+        rain = rng.binomial(stay_nights, RAIN_PROBABILITY, m)
+        food = food_price * stay_nights * rng.lognormal(0.0, PRICE_NOISE, m) + RAIN_EXTRA * rain
+
+        discount = rng.random(m) < DISCOUNT_PROBABILITY
+        transport = transport_cost * rng.lognormal(0.0, PRICE_NOISE, m) * (1 - DISCOUNT * discount)
+
+        total = hotel + food + transport
+        within += int(np.count_nonzero(total <= budget))
+        total_sum += float(total.sum())
+        counts += np.histogram(np.minimum(total, upper), bins=edges)[0]
+
+        festivals += int(festival.sum())
+        rain_days += int(rain.sum())
+        discounts += int(discount.sum())
+        done += m
+
+    return {
+        "scenarios": scenarios,
+        "base": base,
+        "p_within_budget": within / scenarios,
+        "mean": total_sum / scenarios,
+        "quantiles": histogram_quantiles(counts, edges, QUANTILES),
+        "festival_rate": festivals / (scenarios * stops) if stops else 0.0,
+        "rain_days_mean": rain_days / scenarios,
+        "discount_rate": discounts / scenarios,
+    }
@@ -0,0 +1,96 @@
+import itertools
+
+import numpy as np
+
+from distances import EARTH_RADIUS_KM
+
+# ================== SPATIAL INDEX ==================
+#
+# Градовете са точки върху единичната сфера (x, y, z), разпределени в
+# кубична решетка. Клетките се пазят като сортиран масив от int64 ключове,
+# така че заявка за радиус обхожда само съседните клетки, а не целия каталог.
+
+CELL_KM = 50
+
+
+def unit_vectors(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(np.minimum(km / (2 * EARTH_RADIUS_KM), np.pi / 2))
+
+
+class SpatialIndex:
+    def __init__(self, names, lat, lon, cell_km=CELL_KM):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.xyz = unit_vectors(lat, lon)
+        self.cell = km_to_chord(cell_km)
+        self.side = int(np.ceil(2 / self.cell)) + 2
+
+        keys = self.keys(np.floor((self.xyz + 1) / self.cell).astype(np.int64))
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    def keys(self, cells):
+        return (cells[..., 0] * self.side + cells[..., 1]) * self.side + cells[..., 2]
+
+    def candidates(self, point, chord):
+        low = np.floor((point - chord + 1) / self.cell).astype(np.int64)
+        high = np.floor((point + chord + 1) / self.cell).astype(np.int64)
+        if np.prod(high - low + 1) > len(self.names):
+            # Радиусът покрива повече клетки, отколкото има градове
+            return np.arange(len(self.names))
+
+        ranges = [np.arange(lo, hi + 1) for lo, hi in zip(low, high)]
+        cells = np.array(list(itertools.product(*ranges)), dtype=np.int64)
+        keys = self.keys(cells)
+        starts = np.searchsorted(self.sorted_keys, keys, side="left")
+        ends = np.searchsorted(self.sorted_keys, keys, side="right")
+        found = [self.order[s:e] for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+    def query_point(self, point, radius_km):
+        chord = km_to_chord(radius_km)
+        idx = self.candidates(point, chord)
+        dist = np.linalg.norm(self.xyz[idx] - point, axis=1)
+        keep = dist <= chord
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist, kind="stable")
+        return idx[order], chord_to_km(dist[order])
+
+    def within(self, name, radius_km):
+        # Градове до radius_km от дадения град, без самия него
+        idx, km = self.query_point(self.xyz[self.index[name]], radius_km)
+        return [(self.names[i], float(d)) for i, d in zip(idx, km) if self.names[i] != name]
+
+    def nearest(self, name, k, exclude=()):
+        point = self.xyz[self.index[name]]
+        skip = set(exclude) | {name}
+        wanted = k + len(skip)
+        radius = CELL_KM
+        while True:
+            idx, km = self.query_point(point, radius)
+            if len(idx) >= min(wanted, len(self.names)) or radius >= np.pi * EARTH_RADIUS_KM:
+                break
+            radius *= 2
+        result = [(self.names[i], float(d)) for i, d in zip(idx, km) if self.names[i] not in skip]
+        return result[:k]
+
+    def near_route(self, cities, radius_km, k=None):
+        # Градове до radius_km от която и да е спирка, с разстояние до най-близката;
+        # при зададено k - само k-те най-близки
+        stops = set(cities)
+        best = {}
+        for city in cities:
+            for name, km in self.within(city, radius_km):
+                if name not in stops and km < best.get(name, np.inf):
+                    best[name] = km
+        return sorted(best.items(), key=lambda item: item[1])[:k]
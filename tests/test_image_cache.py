@@ -0,0 +1,138 @@
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from image_cache import ImageCache
+
+# ================== IMAGE CACHE ==================
+#
+# ImageCache срещу локален http.server: /red.png и /copy.png връщат една и
+# съща снимка, /blue.png друга, /slow.png отговаря след SLOW_SECONDS, а
+# всичко останало е 404.
+#
+#   python -m pytest tests
+
+SLOW_SECONDS = 1.0
+
+
+def png(color, size=(1600, 1000)):
+    out = io.BytesIO()
+    Image.new("RGB", size, color).save(out, format="PNG")
+    return out.getvalue()
+
+
+IMAGES = {"/red.png": png("red"), "/copy.png": png("red"), "/blue.png": png("blue"), "/slow.png": png("green")}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        body = IMAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        if self.path == "/slow.png":
+            time.sleep(SLOW_SECONDS)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    httpd.hits = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url(server, path):
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+def test_fetch_makes_thumbnail_and_reuses_disk(server, tmp_path):
+    cache = ImageCache(root=str(tmp_path), size=(400, 200))
+    data = cache.get(url(server, "/red.png"))
+
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.format == "JPEG"
+        assert img.width <= 400 and img.height <= 200
+
+    # Нов процес със същата директория не тегли наново
+    again = ImageCache(root=str(tmp_path)).get(url(server, "/red.png"))
+    assert again == data
+    assert server.hits == ["/red.png"]
+
+
+def test_same_content_is_stored_once(server, tmp_path):
+    cache = ImageCache(root=str(tmp_path))
+    assert cache.get(url(server, "/red.png")) == cache.get(url(server, "/copy.png"))
+    assert len(os.listdir(cache.blobs)) == 1
+    assert len(os.listdir(cache.urls)) == 2
+
+
+def test_evicts_least_recently_used(server, tmp_path):
+    cache = ImageCache(root=str(tmp_path))
+    red = cache.get(url(server, "/red.png"))
+    red_path = cache.blob_path(os.listdir(cache.blobs)[0][:-len(".jpg")])
+    os.utime(red_path, (0, 0))
+
+    cache.max_bytes = len(red)
+    cache.get(url(server, "/blue.png"))
+
+    assert not os.path.exists(red_path)
+    assert len(os.listdir(cache.blobs)) == 1
+    assert cache.lookup(url(server, "/red.png")) is None
+
+
+def test_missing_and_unreachable_return_none(server, tmp_path):
+    cache = ImageCache(root=str(tmp_path), timeout=1)
+    assert cache.get(url(server, "/missing.png")) is None
+
+    # Затворен порт: връзката се отказва веднага
+    probe = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    closed = f"http://127.0.0.1:{probe.server_address[1]}/red.png"
+    probe.server_close()
+    assert cache.get(closed) is None
+
+
+def test_failed_fetch_is_not_retried_until_retry_after(server, tmp_path):
+    cache = ImageCache(root=str(tmp_path), retry_after=60)
+    missing = url(server, "/missing.png")
+    cache.prefetch([missing])[0].result(timeout=5)
+    assert cache.get(missing) is None
+    assert cache.get(missing, wait=0) is None
+    assert server.hits == ["/missing.png"]
+
+    cache.retry_after = 0
+    cache.failures[missing] = 0
+    assert cache.get(missing) is None
+    assert server.hits == ["/missing.png", "/missing.png"]
+
+
+def test_get_without_wait_does_not_block(server, tmp_path):
+    cache = ImageCache(root=str(tmp_path))
+    started = time.perf_counter()
+    assert cache.get(url(server, "/slow.png"), wait=0) is None
+    assert time.perf_counter() - started < SLOW_SECONDS / 2
+
+    # Тегленето продължава във фонов режим и следващият rerun го намира на диска
+    cache.submit(url(server, "/slow.png")).result(timeout=5)
+    assert cache.get(url(server, "/slow.png"), wait=0) is not None
+    assert server.hits == ["/slow.png"]
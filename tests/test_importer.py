@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import Catalog, build_catalog, load_seed
+from importer import IMPORTED_POSITION, run_import
+
+# ================== IMPORTER ==================
+#
+# Внос на малък GeoNames дъмп в каталог, построен от cities.json, и
+# повторен внос с по-нова дата на промяна.
+#
+#   python -m pytest tests
+
+GERMANY = "🇩🇪 Германия"
+
+
+def seed_city(name):
+    return next(city for city in load_seed()["cities"] if city["name"] == name)
+
+
+def dump_line(geonameid, name, alternate_names, lat, lon, code, population, modified):
+    fields = [str(geonameid), name, name, alternate_names, str(lat), str(lon), "P", "PPL", code,
+              "", "", "", "", "", str(population), "", "", "Europe/Berlin", modified]
+    return "\t".join(fields) + "\n"
+
+
+def write_dump(path, modified, berlin_population, leipzig_lat):
+    berlin = seed_city("Берлин")
+    with open(path, "w", encoding="utf-8") as f:
+        # Берлин съвпада с ръчно въведения град по алтернативно име и близост
+        f.write(dump_line(1, "Berlin", "Берлин,Berlin", berlin["lat"] + 0.05, berlin["lon"], "DE",
+                          berlin_population, modified))
+        f.write(dump_line(2, "Leipzig", "Лайпциг", leipzig_lat, 12.37, "DE", 600_000, modified))
+        f.write(dump_line(3, "Plovdiv", "Пловдив", 42.15, 24.75, "BG", 340_000, modified))
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "cities.db")
+    build_catalog(path=path)
+    return path
+
+
+def test_import_links_curated_and_maps_country_codes(db, tmp_path):
+    dump = str(tmp_path / "dump.txt")
+    write_dump(dump, "2024-01-01", 3_600_000, 51.34)
+    assert run_import(dump, db, min_population=0)["places"] == 3
+
+    with sqlite3.connect(db) as conn:
+        rows = dict(conn.execute("SELECT geonameid, country FROM cities WHERE geonameid IS NOT NULL"))
+        berlin = conn.execute("SELECT name, geonameid FROM cities WHERE geonameid = 1").fetchone()
+    assert rows == {1: GERMANY, 2: GERMANY, 3: "🇧🇬 България"}
+    assert berlin == ("Берлин", 1)
+
+    catalog = Catalog.load(db)
+    assert "🇧🇬 България" not in catalog.countries
+    assert catalog.city_names(GERMANY)[-1] == "Leipzig"
+
+
+def test_reimport_keeps_curated_order_and_coordinates(db, tmp_path):
+    dump = str(tmp_path / "dump.txt")
+    write_dump(dump, "2024-01-01", 3_600_000, 51.34)
+    run_import(dump, db, min_population=0)
+    before = Catalog.load(db)
+    berlin_before = before.coords("Берлин")
+
+    # По-нова дата, друго население и други координати
+    write_dump(dump, "2025-06-01", 3_800_000, 51.30)
+    run_import(dump, db, min_population=0, force=True)
+    after = Catalog.load(db)
+
+    assert after.city_names(GERMANY) == before.city_names(GERMANY)
+    assert after.coords("Берлин") == berlin_before
+    with sqlite3.connect(db) as conn:
+        berlin = conn.execute("SELECT position, population, modified FROM cities WHERE geonameid = 1").fetchone()
+        leipzig = conn.execute("SELECT position, lat, modified FROM cities WHERE geonameid = 2").fetchone()
+    assert berlin == (0, 3_800_000, "2025-06-01")
+    # Внесените градове се обновяват изцяло
+    assert leipzig == (IMPORTED_POSITION - 600_000, 51.30, "2025-06-01")
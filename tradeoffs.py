@@ -0,0 +1,42 @@
+import numpy as np
+
+# ================== COST VS TIME ==================
+
+
+def pareto_mask(costs, times):
+    # Точка е Парето-оптимална, ако никоя друга не е по-евтина и по-бърза
+    order = np.lexsort((times, costs))
+    mask = np.zeros(len(costs), dtype=bool)
+    best_time = np.inf
+    for i in order:
+        if times[i] < best_time:
+            mask[i] = True
+            best_time = times[i]
+    return mask
+
+
+def compare_options(distance, stops, days, transports, hotel_prices, food_price):
+    import pandas as pd
+
+    price_per_km = np.array([t.price_per_km for t in transports], dtype=float)
+    speed = np.array([t.speed for t in transports], dtype=float)
+    fixed_cost = np.array([t.fixed_cost for t in transports], dtype=float)
+    overhead_hours = np.array([t.overhead_hours for t in transports], dtype=float)
+    nightly = np.array(list(hotel_prices.values()), dtype=float)
+
+    # Оси: транспорт x хотел; stops е и броят отсечки, всяка със своя такса и загубено време
+    transport_cost = stops * fixed_cost + distance * price_per_km
+    stay_cost = stops * days * (nightly + food_price)
+    costs = (transport_cost[:, None] + stay_cost[None, :]).ravel()
+    times = np.repeat(stops * overhead_hours + distance / speed, len(nightly))
+
+    names = np.repeat([t.name() for t in transports], len(nightly))
+    hotels = np.tile(list(hotel_prices), len(transports))
+    table = pd.DataFrame({
+        "Транспорт": names,
+        "Хотел": hotels,
+        "Обща сума": costs.round(2),
+        "Време за път (ч)": times.round(1),
+        "Парето": pareto_mask(costs, times),
+    })
+    return table.sort_values(["Обща сума", "Време за път (ч)"], ignore_index=True)
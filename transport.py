@@ -0,0 +1,51 @@
+from abc import ABC, abstractmethod
+
+# ================== TRANSPORT ==================
+
+class Transport(ABC):
+    def __init__(self, price_per_km, speed, fixed_cost=0, overhead_hours=0):
+        self.price_per_km = price_per_km
+        self.speed = speed
+        # Такса и загубено време за всяка отделна отсечка (гара, летище)
+        self.fixed_cost = fixed_cost
+        self.overhead_hours = overhead_hours
+
+    def travel_cost(self, distance):
+        return distance * self.price_per_km
+
+    def travel_time(self, distance):
+        return distance / self.speed
+
+    def leg_cost(self, distance):
+        return self.fixed_cost + self.travel_cost(distance)
+
+    def leg_time(self, distance):
+        return self.overhead_hours + self.travel_time(distance)
+
+    @abstractmethod
+    def name(self):
+        pass
+
+class Car(Transport):
+    def __init__(self):
+        super().__init__(0.25, 80)
+    def name(self):
+        return "🚗 Кола"
+
+class Train(Transport):
+    def __init__(self):
+        super().__init__(0.18, 110, overhead_hours=0.5)
+    def name(self):
+        return "🚆 Влак"
+
+class Plane(Transport):
+    def __init__(self):
+        super().__init__(0.45, 600, fixed_cost=60, overhead_hours=3)
+    def name(self):
+        return "✈️ Самолет"
+
+TRANSPORTS = {
+    "Кола": Car,
+    "Влак": Train,
+    "Самолет": Plane,
+}